@@ -32,6 +32,38 @@ class _PooledConn:
                 pass
 
 
+def _pool_connection_factory():
+    """psycopg2 connection class that remembers whether its session was set up."""
+    import psycopg2.extensions
+
+    class _SfConnection(psycopg2.extensions.connection):
+        sf_session_ready = False
+        sf_prepared = None  # set of PREPAREd statement names (per session)
+        sf_cursor = None  # reusable client-side cursor (see voices_db._cur)
+
+    return _SfConnection
+
+
+def _db_session_init(conn) -> None:
+    """Session-level settings, applied once per physical connection.
+
+    Committed right away so a later rollback() (see db_init) cannot undo it.
+    Replaces the per-request `SET statement_timeout` round-trip.
+    """
+    try:
+        cur = conn.cursor()
+        cur.execute("SET statement_timeout = '5000'")
+        conn.commit()
+        conn.sf_prepared = set()
+        conn.sf_cursor = cur
+        conn.sf_session_ready = True
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
+
 def db_connect():
     """Get a DB connection.
 
@@ -56,7 +88,9 @@ def db_connect():
         maxconn = 2
 
     if _DB_POOL is None:
-        _DB_POOL = ThreadedConnectionPool(1, maxconn, dsn=dsn, connect_timeout=5)
+        _DB_POOL = ThreadedConnectionPool(
+            1, maxconn, dsn=dsn, connect_timeout=5, connection_factory=_pool_connection_factory()
+        )
 
     # ThreadedConnectionPool raises PoolError immediately when exhausted.
     # For our job workers, a brief wait is safer than failing the whole job.
@@ -64,6 +98,8 @@ def db_connect():
     for i in range(30):
         try:
             conn = _DB_POOL.getconn()
+            if not getattr(conn, 'sf_session_ready', True):
+                _db_session_init(conn)
             return _PooledConn(_DB_POOL, conn)
         except PoolError as e:
             last_err = e
@@ -188,6 +224,11 @@ CREATE TABLE IF NOT EXISTS sf_voices (
         cur.execute("ALTER TABLE sf_voices ADD COLUMN IF NOT EXISTS debut BOOLEAN NOT NULL DEFAULT FALSE")
     except Exception:
         pass
+    # Voices list is ORDER BY updated_at DESC LIMIT n: walk the index, no sort.
+    try:
+        cur.execute("CREATE INDEX IF NOT EXISTS sf_voices_updated_at_idx ON sf_voices (updated_at DESC)")
+    except Exception:
+        pass
 
     # Settings (small JSON blobs)
     cur.execute(
@@ -300,10 +341,28 @@ CREATE TABLE IF NOT EXISTS sf_push_subscriptions (
     )
 
 
+def _db_prewarm(conn) -> None:
+    """Load the small, hot voices table + its list index into shared_buffers.
+
+    Best-effort and in its own transaction: without the pg_prewarm extension
+    (or the privilege to use it) the error is rolled back and ignored.
+    """
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT pg_prewarm('sf_voices'), pg_prewarm('sf_voices_updated_at_idx')")
+        conn.commit()
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
+
 def db_init(conn) -> None:
     """Prepare a connection for use.
 
-    - Always rollback-safe + statement_timeout.
+    - Always rollback-safe (statement_timeout is a session setting applied once
+      per pooled connection in db_connect, not per request).
     - Runs schema bootstrap/migrations only once per process to avoid DB pool exhaustion.
     """
     global _DB_INIT_DONE, _DB_INIT_LOCK
@@ -315,15 +374,11 @@ def db_init(conn) -> None:
     except Exception:
         pass
 
-    cur = conn.cursor()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
-
     if _DB_INIT_DONE:
         return
 
+    cur = conn.cursor()
+
     # Lazily init lock to avoid importing threading in cold paths unnecessarily.
     if _DB_INIT_LOCK is None:
         import threading
@@ -342,6 +397,7 @@ def db_init(conn) -> None:
                 conn.rollback()
             except Exception:
                 pass
+        _db_prewarm(conn)
         _DB_INIT_DONE = True
     try:
         cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS sf_push_endpoint_uniq ON sf_push_subscriptions (endpoint)")
@@ -420,10 +476,6 @@ def db_list_jobs(conn, limit: int = 60, before: int | None = None):
     If before is provided, returns jobs with created_at < before.
     """
     cur = conn.cursor()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
 
     if before is not None:
         cur.execute(
@@ -478,10 +530,6 @@ def db_append_job_event(conn, job_id: str, ts: int, engine: str = '', line_no: i
 
 def db_list_job_events(conn, job_id: str, after_id: int = 0, limit: int = 250):
     cur = conn.cursor()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
 
     lim = int(limit or 250)
     if lim < 1:
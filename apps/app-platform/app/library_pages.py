@@ -248,23 +248,30 @@ try{ bindMonitorClose(); setMonitorEnabled(loadMonitorPref()); }catch(e){}
 """
 
 
-def _html_page(title: str, body: str) -> str:
-    return f"""<!doctype html>
+# Static page shell, built once at import: everything except title and body.
+_HTML_HEAD_PREFIX = """<!doctype html>
 <html>
 <head>
   <meta charset='utf-8'/>
   <meta name='viewport' content='width=device-width, initial-scale=1'/>
-  <title>{title}</title>
-  <style>{LIBRARY_BASE_CSS}</style>
-</head>
-<body>
-{body}
-{USER_MENU_JS}
-{DEBUG_PREF_APPLY_JS}
-{MONITOR_HTML}
-{MONITOR_JS}
-</body>
-</html>"""
+  <title>"""
+_HTML_HEAD_MID = (
+    "</title>\n"
+    "  <style>" + LIBRARY_BASE_CSS + "</style>\n"
+    "</head>\n"
+    "<body>\n"
+)
+_HTML_TAIL = (
+    "\n" + USER_MENU_JS
+    + "\n" + DEBUG_PREF_APPLY_JS
+    + "\n" + MONITOR_HTML
+    + "\n" + MONITOR_JS
+    + "\n</body>\n</html>"
+)
+
+
+def _html_page(title: str, body: str) -> str:
+    return "".join((_HTML_HEAD_PREFIX, title, _HTML_HEAD_MID, body, _HTML_TAIL))
 
 
 def _parse_characters_yaml(chars_yaml: str) -> list[dict[str, Any]]:
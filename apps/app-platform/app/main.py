@@ -16,10 +16,10 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.websockets import WebSocketDisconnect
 
 from .auth import register_passphrase_auth
-from .ui_header_shared import USER_MENU_HTML, USER_MENU_JS
+from .ui_header_shared import USER_MENU_HTML, USER_MENU_JS, nav_html as shared_nav_html
 from .ui_audio_shared import AUDIO_DOCK_JS
 from .ui_debug_shared import DEBUG_PREF_APPLY_JS
-from .ui_page_shared import render_page
+from .ui_page_shared import SafeStr, render_page
 from .ui_refactor_shared import base_css
 from .library_pages import register_library_pages
 from .library_viewer import register_library_viewer
@@ -44,7 +44,9 @@ from .voices_db import (
     get_voice_db,
     upsert_voice_db,
     set_voice_enabled_db,
+    set_voice_sample_db,
     delete_voice_db,
+    invalidate_voices_cache,
 )
 
 from .voice_meta import analyze_voice_metadata
@@ -4583,20 +4585,7 @@ def voices_edit_page(voice_id: str, response: Response):
         + "\n" + AUDIO_DOCK_JS
     )
 
-    nav_html = (
-        "<div class='navBar'>"
-        "  <div class='top'>"
-        "    <div>"
-        "      <div class='brandRow'><h1><a class='brandLink' href='/'>StoryForge</a></h1><div class='pageName'>Edit voice</div></div>"
-        "      <div class='muted'><code>__VID__</code></div>"
-        "    </div>"
-        "    <div class='row headActions'>"
-        "      <a href='/#tab-voices'><button class='secondary' type='button'>Back</button></a>"
-        "      __USER_MENU_HTML__"
-        "    </div>"
-        "  </div>"
-        "</div>"
-    )
+    nav_html = shared_nav_html('Edit voice', subtitle_html='<code>__VID__</code>', back_href='/#tab-voices')
 
     content_html = """
   __DEBUG_BANNER_HTML__
@@ -4910,7 +4899,7 @@ async function deleteVoice(){
 """
 
     html = render_page(
-        title='StoryForge - Edit Voice',
+        title=SafeStr('StoryForge - Edit Voice'),
         style_css=style_css,
         body_top_html=body_top,
         nav_html=nav_html,
@@ -4990,19 +4979,7 @@ def voices_new_page(response: Response):
         + "\n" + AUDIO_DOCK_JS
     )
 
-    nav_html = (
-        "<div class='navBar'>"
-        "  <div class='top'>"
-        "    <div>"
-        "      <div class='brandRow'><h1><a class='brandLink' href='/'>StoryForge</a></h1><div class='pageName'>Generate voice</div></div>"
-        "    </div>"
-        "    <div class='row headActions'>"
-        "      <a href='/#tab-voices'><button class='secondary' type='button'>Back</button></a>"
-        "      __USER_MENU_HTML__"
-        "    </div>"
-        "  </div>"
-        "</div>"
-    )
+    nav_html = shared_nav_html('Generate voice', back_href='/#tab-voices')
 
     content_html = """
   __DEBUG_BANNER_HTML__
@@ -5771,7 +5748,7 @@ try{ if (typeof __sfSetDebugInfo === 'function') __sfSetDebugInfo('ok'); }catch(
 """
 
     html = render_page(
-        title='StoryForge - Generate voice',
+        title=SafeStr('StoryForge - Generate voice'),
         style_css=style_css,
         body_top_html=body_top,
         nav_html=nav_html,
@@ -5946,20 +5923,7 @@ def todo_page(request: Request, response: Response):
         + str(AUDIO_DOCK_JS)
     )
 
-    nav_html = (
-        "<div class='navBar'>"
-        "  <div class='top'>"
-        "    <div>"
-        "      <div class='brandRow'><h1><a class='brandLink' href='/'>StoryForge</a></h1><div class='pageName'>TODO</div></div>"
-        "      <div class='muted'>Internal tracker (check/uncheck requires login).</div>"
-        "    </div>"
-        "    <div class='row headActions'>"
-        "      <a href='/'><button class='secondary' type='button'>Back</button></a>"
-        "      __USER_MENU_HTML__"
-        "    </div>"
-        "  </div>"
-        "</div>"
-    )
+    nav_html = shared_nav_html('TODO', subtitle_html='Internal tracker (check/uncheck requires login).', back_href='/')
 
     content_html = """
   __DEBUG_BANNER_HTML__
@@ -6044,7 +6008,7 @@ function clearHighlights(){
 """
 
     html = render_page(
-        title='StoryForge - TODO',
+        title=SafeStr('StoryForge - TODO'),
         style_css=style_css,
         body_top_html=body_top,
         nav_html=nav_html,
@@ -6107,20 +6071,7 @@ def base_template_page(response: Response):
         + str(AUDIO_DOCK_JS)
     )
 
-    nav_html = (
-        "<div class='navBar'>"
-        "  <div class='top'>"
-        "    <div>"
-        "      <div class='brandRow'><h1><a class='brandLink' href='/'>StoryForge</a></h1><div class='pageName'>Base template</div></div>"
-        "      <div class='muted'>Reference page: header + debug + player + monitor + sample middle.</div>"
-        "    </div>"
-        "    <div class='row headActions'>"
-        "      <a href='/'><button class='secondary' type='button'>Back</button></a>"
-        "      __USER_MENU_HTML__"
-        "    </div>"
-        "  </div>"
-        "</div>"
-    )
+    nav_html = shared_nav_html('Base template', subtitle_html='Reference page: header + debug + player + monitor + sample middle.', back_href='/')
 
     content_html = """
   __DEBUG_BANNER_HTML__
@@ -6329,7 +6280,7 @@ try{ loadSweepVoices(); }catch(_e){}
 """
 
     html = render_page(
-        title='StoryForge - Base template',
+        title=SafeStr('StoryForge - Base template'),
         style_css=style_css,
         body_top_html=body_top,
         nav_html=nav_html,
@@ -7770,7 +7721,10 @@ def api_voices_list():
         conn = db_connect()
         try:
             db_init(conn)
-            return {'ok': True, 'voices': list_voices_db(conn)}
+            # Rows are plain str/int/bool dicts: serialize directly instead of
+            # letting FastAPI walk every field through jsonable_encoder.
+            body = json.dumps({'ok': True, 'voices': list_voices_db(conn)}, separators=(',', ':'))
+            return Response(content=body, media_type='application/json')
         finally:
             conn.close()
     except Exception as e:
@@ -7923,7 +7877,7 @@ def api_voices_update(payload: dict[str, Any] = Body(default={})):  # noqa: B008
         conn = db_connect()
         try:
             db_init(conn)
-            v = get_voice_db(conn, voice_id)
+            v = get_voice_db(conn, voice_id, use_cache=False)
             debut = bool((v or {}).get('debut'))
 
             # Lock name/id once voice has debuted.
@@ -7975,8 +7929,9 @@ FROM sf_voices WHERE id=%s
                 )
                 cur.execute("DELETE FROM sf_voices WHERE id=%s", (voice_id,))
                 conn.commit()
+                invalidate_voices_cache()
                 voice_id = new_id
-                v = get_voice_db(conn, voice_id)
+                v = get_voice_db(conn, voice_id, use_cache=False)
 
             # Update mutable fields
             upsert_voice_db(
@@ -8024,7 +7979,7 @@ def api_voices_analyze_metadata(voice_id: str):
         conn = db_connect()
         try:
             db_init(conn)
-            v = get_voice_db(conn, voice_id)
+            v = get_voice_db(conn, voice_id, use_cache=False)
         finally:
             conn.close()
 
@@ -9469,6 +9424,7 @@ def api_production_produce_audio(payload: dict[str, Any] = Body(default={})):  #
                     cur3 = conn3.cursor()
                     cur3.execute("UPDATE sf_voices SET debut=TRUE WHERE id = ANY(%s)", (vids,))
                     conn3.commit()
+                    invalidate_voices_cache()
                 finally:
                     conn3.close()
         except Exception:
@@ -9794,7 +9750,7 @@ def api_voices_update(voice_id: str, payload: dict[str, Any]):
         conn = db_connect()
         try:
             db_init(conn)
-            existing = get_voice_db(conn, voice_id)
+            existing = get_voice_db(conn, voice_id, use_cache=False)
             engine = str(payload.get('engine') if 'engine' in payload else existing.get('engine') or '')
             voice_ref = str(payload.get('voice_ref') if 'voice_ref' in payload else existing.get('voice_ref') or '')
             display_name = str(payload.get('display_name') if 'display_name' in payload else existing.get('display_name') or voice_id)
@@ -9835,7 +9791,7 @@ def api_voices_delete(voice_id: str):
         conn = db_connect()
         try:
             db_init(conn)
-            v = get_voice_db(conn, voice_id)
+            v = get_voice_db(conn, voice_id, use_cache=False)
             delete_voice_db(conn, voice_id)
         finally:
             conn.close()
@@ -10046,16 +10002,7 @@ def api_voice_sample(voice_id: str):
         conn = db_connect()
         try:
             db_init(conn)
-            upsert_voice_db(
-                conn,
-                voice_id,
-                engine,
-                voice_ref,
-                str(v.get('display_name') or voice_id),
-                bool(v.get('enabled', True)),
-                text,
-                sample_url,
-            )
+            set_voice_sample_db(conn, voice_id, text, sample_url)
         finally:
             conn.close()
 
@@ -10,73 +10,50 @@ from __future__ import annotations
 AUDIO_DOCK_JS = """
 <script>
 // Global audio player (survives tab re-renders; iOS-friendly)
+var __SF_AUDIO_DOCK_CSS = "<style id='sfAudioDockCss'>"+
+  "#sfAudioDock{position:fixed;left:12px;right:12px;bottom:calc(64px + env(safe-area-inset-bottom, 0px));z-index:99998;padding:10px 12px;border:1px solid rgba(255,255,255,0.10);border-radius:14px;background:rgba(20,22,30,0.96);-webkit-backdrop-filter:blur(6px);backdrop-filter:blur(6px);box-shadow:0 12px 40px rgba(0,0,0,0.35);display:none;}"+
+  "#sfAudioDock .sfAudioRow{display:flex;align-items:center;gap:10px;}"+
+  "#sfAudioTitle{flex:1;min-width:0;font-weight:900;font-size:13px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;}"+
+  "#sfAudioDock .sfAudioClose{width:34px;height:30px;border-radius:10px;border:1px solid rgba(255,255,255,0.10);background:transparent;color:var(--text);font-weight:900;}"+
+  "#sfAudioEl{width:100%;margin-top:8px;}"+
+  "</style>";
+
+var __SF_AUDIO_DOCK_HTML = "<div class='sfAudioRow'>"+
+  "<div id='sfAudioTitle'>Audio</div>"+
+  "<button type='button' class='sfAudioClose'>\u00d7</button>"+
+  "</div>"+
+  "<audio id='sfAudioEl' controls preload='none'></audio>";
+
 function __sfEnsureAudioDock(){
   try{
-    var d=document.getElementById('sfAudioDock');
-    if (d) return d;
+    var d=window.__sfDock;
+    if (d && d.parentNode) return d;
+    d=document.getElementById('sfAudioDock');
+    if (d){
+      window.__sfDock=d;
+      window.__sfAudioEl=document.getElementById('sfAudioEl');
+      window.__sfAudioTitle=document.getElementById('sfAudioTitle');
+      return d;
+    }
+    if (!document.getElementById('sfAudioDockCss')){
+      (document.head || document.body).insertAdjacentHTML('beforeend', __SF_AUDIO_DOCK_CSS);
+    }
     d=document.createElement('div');
     d.id='sfAudioDock';
-    d.style.position='fixed';
-    d.style.left='12px';
-    d.style.right='12px';
-    d.style.bottom='calc(64px + env(safe-area-inset-bottom, 0px))';
-    d.style.zIndex='99998';
-    d.style.padding='10px 12px';
-    d.style.border='1px solid rgba(255,255,255,0.10)';
-    d.style.borderRadius='14px';
-    d.style.background='rgba(20,22,30,0.96)';
-    d.style.backdropFilter='blur(6px)';
-    d.style.webkitBackdropFilter='blur(6px)';
-    d.style.boxShadow='0 12px 40px rgba(0,0,0,0.35)';
-    d.style.display='none';
-
-    var row=document.createElement('div');
-    row.style.display='flex';
-    row.style.alignItems='center';
-    row.style.gap='10px';
-
-    var t=document.createElement('div');
-    t.id='sfAudioTitle';
-    t.style.flex='1';
-    t.style.minWidth='0';
-    t.style.fontWeight='900';
-    t.style.fontSize='13px';
-    t.style.whiteSpace='nowrap';
-    t.style.overflow='hidden';
-    t.style.textOverflow='ellipsis';
-    t.textContent='Audio';
-
-    var x=document.createElement('button');
-    x.type='button';
-    x.textContent='×';
-    x.style.width='34px';
-    x.style.height='30px';
-    x.style.borderRadius='10px';
-    x.style.border='1px solid rgba(255,255,255,0.10)';
-    x.style.background='transparent';
-    x.style.color='var(--text)';
-    x.style.fontWeight='900';
-    x.onclick=function(){
+    d.innerHTML=__SF_AUDIO_DOCK_HTML;
+    var x=d.querySelector('.sfAudioClose');
+    if (x) x.onclick=function(){
       try{
-        var a=document.getElementById('sfAudioEl');
+        var a=window.__sfAudioEl || document.getElementById('sfAudioEl');
         if (a) a.pause();
       }catch(_e){}
       try{ d.style.display='none'; }catch(_e){}
     };
-
-    row.appendChild(t);
-    row.appendChild(x);
-
-    var a=document.createElement('audio');
-    a.id='sfAudioEl';
-    a.controls=true;
-    a.preload='none';
-    a.style.width='100%';
-    a.style.marginTop='8px';
-
-    d.appendChild(row);
-    d.appendChild(a);
     document.body.appendChild(d);
+    // Cache references so __sfPlayAudio doesn't re-query the DOM on every play.
+    window.__sfDock=d;
+    window.__sfAudioEl=d.querySelector('#sfAudioEl');
+    window.__sfAudioTitle=d.querySelector('#sfAudioTitle');
     return d;
   }catch(e){ return null; }
 }
@@ -86,8 +63,8 @@ function __sfPlayAudio(url, title){
     url = String(url||'').trim();
     if (!url) return;
     var d=__sfEnsureAudioDock();
-    var a=document.getElementById('sfAudioEl');
-    var t=document.getElementById('sfAudioTitle');
+    var a=window.__sfAudioEl || document.getElementById('sfAudioEl');
+    var t=window.__sfAudioTitle || document.getElementById('sfAudioTitle');
     if (t) t.textContent = String(title||'Audio');
     if (d) d.style.display='block';
     if (a){
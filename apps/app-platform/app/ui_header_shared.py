@@ -3,6 +3,7 @@
 Scope (incremental):
 - Centralize the user-menu (avatar button + dropdown) HTML.
 - Centralize the user-menu toggle JS (toggle + outside click).
+- Centralize the standalone-page nav bar (brand + page name + Back + user menu).
 
 This is the common piece used by:
 - main SPA (/)
@@ -14,6 +15,9 @@ Keep HTML/CSS semantically identical; keep JS compatible with older iOS Safari.
 
 from __future__ import annotations
 
+import functools
+import html as pyhtml
+
 
 USER_MENU_HTML = """
       <div class='menuWrap'>
@@ -42,6 +46,40 @@ USER_MENU_HTML = """
 """
 
 
+def user_menu_html() -> str:
+    return USER_MENU_HTML
+
+
+@functools.lru_cache(maxsize=256)
+def nav_html(
+    page_name: str,
+    subtitle_html: str = "",
+    back_href: str = "/",
+    include_user_menu: bool = True,
+) -> str:
+    """Return the sticky nav bar used by standalone pages.
+
+    Inputs come from a small fixed set (page names, Back targets), so the
+    rendered string is cached per signature. subtitle_html is inserted as-is.
+    """
+    sub = f"      <div class='muted'>{subtitle_html}</div>" if subtitle_html else ""
+    menu = "      " + user_menu_html() if include_user_menu else ""
+    return (
+        "<div class='navBar'>"
+        "  <div class='top'>"
+        "    <div>"
+        f"      <div class='brandRow'><h1><a class='brandLink' href='/'>StoryForge</a></h1><div class='pageName'>{pyhtml.escape(page_name)}</div></div>"
+        f"{sub}"
+        "    </div>"
+        "    <div class='row headActions'>"
+        f"      <a href='{pyhtml.escape(back_href)}'><button class='secondary' type='button'>Back</button></a>"
+        f"{menu}"
+        "    </div>"
+        "  </div>"
+        "</div>"
+    )
+
+
 USER_MENU_JS = """
 <script>
 function __sfMenuClamp(v, lo, hi){
@@ -58,13 +96,22 @@ function __sfMenuClamp(v, lo, hi){
   }
 }
 
+function __sfTopMenuEl(){
+  // Cached #topMenu lookup (re-queried only if the node was detached/replaced).
+  var m = window.__sfTopMenu;
+  if (m && m.parentNode) return m;
+  m = document.getElementById('topMenu');
+  window.__sfTopMenu = m || null;
+  return m;
+}
+
 function __sfPositionUserMenu(){
   // iOS Safari can clip/tear absolutely-positioned dropdowns inside stacked/filtered containers.
   // Also: window.innerHeight can be the *layout viewport*, while the visible viewport is visualViewport.
   // We position relative to the visible viewport and clamp inside it.
   try{
     var btn = document.querySelector('.menuWrap .userBtn');
-    var m = document.getElementById('topMenu');
+    var m = __sfTopMenuEl();
     if (!btn || !m) return;
 
     var r = btn.getBoundingClientRect();
@@ -81,11 +128,13 @@ function __sfPositionUserMenu(){
       }
     }catch(_e){}
 
-    m.style.position = 'fixed';
-    m.style.zIndex = '99999';
+    // All layout reads above happen before the first style write below; skip
+    // no-op writes on repeat calls (scroll/resize) so we don't invalidate layout.
+    if (m.style.position !== 'fixed') m.style.position = 'fixed';
+    if (m.style.zIndex !== '99999') m.style.zIndex = '99999';
 
     // Show first so we can measure height.
-    try{ m.classList.add('show'); }catch(_e){}
+    try{ if (!m.classList.contains('show')) m.classList.add('show'); }catch(_e){}
 
     var pad = 10;
     var w = 266;
@@ -132,7 +181,7 @@ function __sfPositionUserMenu(){
 
 function toggleUserMenu(){
   try{
-    var m=document.getElementById('topMenu');
+    var m=__sfTopMenuEl();
     if(!m) return;
     var on = m.classList.contains('show');
     if (on){
@@ -144,23 +193,39 @@ function toggleUserMenu(){
   }catch(e){}
 }
 
-document.addEventListener('click', function(ev){
-  try{
-    var m=document.getElementById('topMenu');
-    if(!m) return;
-    var w=ev.target && ev.target.closest ? ev.target.closest('.menuWrap') : null;
-    if(!w) m.classList.remove('show');
-  }catch(e){}
-});
+// Wire document/window listeners once, even if this script is included more than once.
+(function(){
+  if (window.__sfMenuWired) return;
+  window.__sfMenuWired = true;
 
-// Reposition on scroll/resize while open.
-try{
-  window.addEventListener('resize', function(){
-    try{ var m=document.getElementById('topMenu'); if (m && m.classList.contains('show')) __sfPositionUserMenu(); }catch(_e){}
+  document.addEventListener('click', function(ev){
+    try{
+      var m=__sfTopMenuEl();
+      if(!m) return;
+      var w=ev.target && ev.target.closest ? ev.target.closest('.menuWrap') : null;
+      if(!w) m.classList.remove('show');
+    }catch(e){}
   });
-  window.addEventListener('scroll', function(){
-    try{ var m=document.getElementById('topMenu'); if (m && m.classList.contains('show')) __sfPositionUserMenu(); }catch(_e){}
-  }, {passive:true});
-}catch(e){}
+
+  // Reposition on scroll/resize while open, coalesced to one call per animation frame.
+  var rafPending = false;
+  var raf = window.requestAnimationFrame || function(cb){ return setTimeout(cb, 16); };
+  function _schedule(){
+    try{
+      if (rafPending) return;
+      var m=__sfTopMenuEl();
+      if (!m || !m.classList.contains('show')) return;
+      rafPending = true;
+      raf(function(){
+        rafPending = false;
+        try{ __sfPositionUserMenu(); }catch(_e){}
+      });
+    }catch(_e){ rafPending = false; }
+  }
+  try{
+    window.addEventListener('resize', _schedule);
+    window.addEventListener('scroll', _schedule, {passive:true});
+  }catch(e){}
+})();
 </script>
 """
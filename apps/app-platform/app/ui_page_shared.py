@@ -1,4 +1,5 @@
 import html as pyhtml
+import sys
 
 # Minimal shared page renderer for "standalone" pages (non-SPA) so we stop
 # duplicating header/menu/debug/player/monitor wiring across pages.
@@ -9,8 +10,28 @@ import html as pyhtml
 # - Let each page supply its own CSS bundle (index/voices/library) while reusing
 #   shared UI modules (debug, audio dock, user menu, monitor).
 
+# Placeholder needles for render_page(), interned once at import.
+_TITLE = sys.intern("__TITLE__")
+_STYLE = sys.intern("__STYLE__")
+_HEAD_EXTRA = sys.intern("__HEAD_EXTRA__")
+_BODY_TOP = sys.intern("__BODY_TOP__")
+_NAV = sys.intern("__NAV__")
+_CONTENT = sys.intern("__CONTENT__")
+_BODY_BOTTOM = sys.intern("__BODY_BOTTOM__")
+
+
+class SafeStr(str):
+    """A str already known to be HTML-safe (e.g. a constant page title).
+
+    esc() returns these unchanged instead of re-scanning them.
+    """
+
+    __slots__ = ()
+
 
 def esc(x) -> str:
+    if isinstance(x, SafeStr):
+        return x
     return pyhtml.escape(str(x or ""))
 
 
@@ -44,11 +65,11 @@ def render_page(
   __BODY_BOTTOM__
 </body>
 </html>"""
-        .replace("__TITLE__", esc(title))
-        .replace("__STYLE__", style_css or "")
-        .replace("__HEAD_EXTRA__", head_extra_html or "")
-        .replace("__BODY_TOP__", body_top_html or "")
-        .replace("__NAV__", nav_html or "")
-        .replace("__CONTENT__", content_html or "")
-        .replace("__BODY_BOTTOM__", body_bottom_html or "")
+        .replace(_TITLE, esc(title))
+        .replace(_STYLE, style_css or "")
+        .replace(_HEAD_EXTRA, head_extra_html or "")
+        .replace(_BODY_TOP, body_top_html or "")
+        .replace(_NAV, nav_html or "")
+        .replace(_CONTENT, content_html or "")
+        .replace(_BODY_BOTTOM, body_bottom_html or "")
     )
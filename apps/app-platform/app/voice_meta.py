@@ -1,17 +1,25 @@
 from __future__ import annotations
 
 import base64
+import functools
+import hashlib
 import json
 import os
+import re
 import shutil
 import subprocess
 import tempfile
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from .db import db_connect, db_init
+from .voices_db import invalidate_voices_cache
 
 
 # Curated hints for Tortoise named voices.
@@ -23,17 +31,179 @@ _TORTOISE_GENDER_HINTS: dict[str, str] = {
 }
 
 
+# Shared HTTP session + small worker pool: the Tinybox calls made by
+# analyze_voice_metadata (analyze/age/gender) are independent, so they run
+# concurrently instead of back to back. The pool is per call (see
+# analyze_voice_metadata); only the session's connections are shared.
+def _new_http_session() -> requests.Session:
+    sess = requests.Session()
+    sess.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+    sess.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+    return sess
+
+
+def _new_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="sf_voice_meta")
+
+
+_HTTP = _new_http_session()
+
+
+def _reinit_after_fork() -> None:
+    # main.py runs analysis in a forked process. The child inherits the
+    # parent's keep-alive sockets.
+    global _HTTP
+    _HTTP = _new_http_session()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+# Resolved once at import (absolute paths; no per-call PATH walk).
+_FFMPEG = shutil.which('ffmpeg')
+_FFPROBE = shutil.which('ffprobe')
+
+# ffmpeg log parsing + LLM JSON cleanup (compiled once).
+# (ffmpeg patterns are bytes: stderr is scanned undecoded, see _ffmpeg_scan.)
+_RE_LUFS = re.compile(rb"\bI:\s*(-?\d+(?:\.\d+)?)\s*LUFS\b")
+_RE_DURATION = re.compile(rb"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?),")
+_RE_STATS_TIME = re.compile(rb"time=\s*(\d+):(\d+):(\d+(?:\.\d+)?)\s")
+_RE_JSON_OUTER = re.compile(r"\{[\s\S]*\}")
+_RE_FENCE_OPEN = re.compile(r"^```[a-zA-Z0-9_-]*\s*")
+_RE_FENCE_CLOSE = re.compile(r"```\s*$")
+_RE_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+# Trait labeling only needs a few seconds of voice: features (and the 16 kHz
+# WAV they are computed from) are limited to the head of the sample.
+_FEATURE_MAX_S = 10
+
+# Trait-labeling model on the Tinybox gateway (/v1/llm).
+_LLM_MODEL = "google/gemma-2-9b-it"
+
+# Persistent analysis cache (one JSON file per key). Re-analyzing the same
+# sample_url skips ffprobe/ffmpeg/features (the sample is still downloaded for
+# the age/gender classifiers), and an identical LLM prompt skips the LLM round
+# trip.
+_META_CACHE_DIR = Path(os.environ.get("SF_CACHE_DIR") or "~/.storyforge/cache").expanduser() / "voice_meta"
+# Bounds: sample URLs carry an upload uuid, so every regenerated sample adds
+# new keys. Each write drops entries past the max age, then the oldest ones
+# beyond the file cap.
+try:
+    _META_CACHE_MAX_FILES = int(os.environ.get("SF_VOICE_META_CACHE_MAX_FILES", "2000") or "2000")
+    _META_CACHE_MAX_AGE_S = float(os.environ.get("SF_VOICE_META_CACHE_MAX_AGE_S", str(30 * 86400)) or "0")
+except Exception:
+    _META_CACHE_MAX_FILES, _META_CACHE_MAX_AGE_S = 2000, 30 * 86400.0
+
+
 def _now() -> int:
     return int(time.time())
 
 
+def _meta_cache_path(key: str) -> Path:
+    return _META_CACHE_DIR / (hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def _meta_cache_get(key: str) -> dict[str, Any] | None:
+    try:
+        with open(_meta_cache_path(key), "r", encoding="utf-8") as f:
+            j = json.load(f)
+        return j if isinstance(j, dict) else None
+    except Exception:
+        return None
+
+
+def _meta_cache_put(key: str, payload: dict[str, Any]) -> None:
+    """Best-effort atomic write; cache failures never break analysis."""
+    try:
+        p = _meta_cache_path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, p)
+    except Exception:
+        return
+    _meta_cache_prune()
+
+
+def _meta_cache_prune() -> None:
+    """Enforce _META_CACHE_MAX_AGE_S / _META_CACHE_MAX_FILES (best-effort)."""
+    try:
+        entries = []
+        with os.scandir(_META_CACHE_DIR) as it:
+            for e in it:
+                if e.name.endswith(".json"):
+                    try:
+                        entries.append((e.stat().st_mtime, e.path))
+                    except OSError:
+                        pass
+        drop = []
+        if _META_CACHE_MAX_AGE_S > 0:
+            cutoff = time.time() - _META_CACHE_MAX_AGE_S
+            drop = [path for mtime, path in entries if mtime < cutoff]
+            entries = [(mtime, path) for mtime, path in entries if mtime >= cutoff]
+        if _META_CACHE_MAX_FILES > 0 and len(entries) > _META_CACHE_MAX_FILES:
+            entries.sort()
+            drop += [path for _mtime, path in entries[: len(entries) - _META_CACHE_MAX_FILES]]
+        for path in drop:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    except Exception:
+        pass
+
+
+def _post_json(url: str, body: dict[str, Any], headers: dict[str, str], timeout: float = 120) -> dict[str, Any]:
+    """POST JSON; return the decoded dict on HTTP 200, else {} (best-effort)."""
+    try:
+        r = _HTTP.post(url, data=_dumpb(body), headers={**headers, "Content-Type": "application/json"}, timeout=timeout)
+        if int(getattr(r, 'status_code', 0) or 0) != 200:
+            return {}
+        j = r.json()
+        return j if isinstance(j, dict) else {}
+    except Exception:
+        return {}
+
+
+def _result(fut: Future | None, timeout: float = 130) -> dict[str, Any]:
+    if fut is None:
+        return {}
+    try:
+        return fut.result(timeout=timeout) or {}
+    except Exception:
+        return {}
+
+
+def _sample_audio_b64(sample_url: str) -> str | None:
+    try:
+        from .spaces_upload import fetch_public_url_bytes
+
+        bb, _ct = fetch_public_url_bytes(sample_url)
+        return base64.b64encode(bb).decode('ascii')
+    except Exception:
+        return None
+
+
+def _file_audio_b64(path: str, max_bytes: int = 50_000_000) -> str | None:
+    """Base64 of an already-downloaded sample (same size cap as the Spaces fetch)."""
+    try:
+        if os.path.getsize(path) > max_bytes:
+            return None
+        with open(path, "rb") as f:
+            return base64.b64encode(f.read()).decode('ascii')
+    except Exception:
+        return None
+
+
 def _ffprobe_duration_s(path: str) -> float | None:
     try:
-        if not shutil.which('ffprobe'):
+        if not _FFPROBE:
             return None
         out = subprocess.check_output(
             [
-                "ffprobe",
+                _FFPROBE,
                 "-v",
                 "error",
                 "-show_entries",
@@ -51,50 +221,90 @@ def _ffprobe_duration_s(path: str) -> float | None:
         return None
 
 
+def _ffmpeg_scan(argv: list[str], timeout: float) -> tuple[int | None, float | None, float | None]:
+    """Run ffmpeg and scan its stderr as it streams: (returncode, duration_s, lufs_i).
+
+    Duration comes from the input header; when that is missing (N/A for some
+    streamed containers) the last progress "time=" (needs -stats) is used.
+    stderr is read as raw bytes in 64 KiB chunks with only a small overlap kept
+    between reads, so the (possibly large) log is never buffered or decoded.
+    The ebur128 summary is the last thing ffmpeg prints, so there is nothing to
+    gain from stopping early; the process is killed only on timeout.
+    """
+    p = subprocess.Popen(
+        argv,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        bufsize=1 << 16,
+    )
+    timer = threading.Timer(timeout, p.kill)
+    timer.start()
+    dur = None
+    t_last = None
+    lufs = None
+    try:
+        tail = b""
+        while True:
+            chunk = p.stderr.read(1 << 16)
+            if not chunk:
+                break
+            buf = tail + chunk
+            if dur is None:
+                m = _RE_DURATION.search(buf)
+                if m:
+                    dur = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3))
+            for mm in _RE_STATS_TIME.finditer(buf):
+                t_last = int(mm.group(1)) * 3600 + int(mm.group(2)) * 60 + float(mm.group(3))
+            # look for summary line like: "I:         -16.8 LUFS" (last one wins):
+            # jump to the last "I:" in the buffer rather than regex-scanning it all.
+            k = buf.rfind(b"I:")
+            if k != -1:
+                mm = _RE_LUFS.search(buf, max(0, k - 1))
+                if mm:
+                    lufs = float(mm.group(1))
+            tail = buf[-256:]
+        rc = p.wait()
+    finally:
+        timer.cancel()
+        p.stderr.close()
+    return rc, (dur if dur is not None else t_last), lufs
+
+
 def _ffmpeg_lufs(path: str) -> float | None:
     """Best-effort integrated loudness in LUFS via ffmpeg ebur128."""
     try:
-        if not shutil.which('ffmpeg'):
+        if not _FFMPEG:
             return None
-        # We parse the final "I:" integrated value from ebur128 summary.
-        p = subprocess.run(
+        # We parse the final "I:" integrated value from ebur128 summary (no true-peak,
+        # no per-frame log: the summary block is all we read).
+        _rc, _dur, lufs = _ffmpeg_scan(
             [
-                "ffmpeg",
+                _FFMPEG,
                 "-hide_banner",
                 "-nostats",
                 "-i",
                 path,
                 "-filter_complex",
-                "ebur128=peak=true",
+                "ebur128=framelog=quiet",
                 "-f",
                 "null",
                 "-",
             ],
-            capture_output=True,
-            text=True,
             timeout=40,
         )
-        txt = (p.stderr or "") + "\n" + (p.stdout or "")
-        # look for summary line like: "I:         -16.8 LUFS"
-        import re
-
-        m = None
-        for mm in re.finditer(r"\bI:\s*(-?\d+(?:\.\d+)?)\s*LUFS\b", txt):
-            m = mm
-        if not m:
-            return None
-        return float(m.group(1))
+        return lufs
     except Exception:
         return None
 
 
 def _audio_to_wav16k(src_path: str, dst_path: str) -> bool:
     try:
-        if not shutil.which('ffmpeg'):
+        if not _FFMPEG:
             return False
         subprocess.run(
             [
-                "ffmpeg",
+                _FFMPEG,
                 "-hide_banner",
                 "-nostats",
                 "-y",
@@ -109,8 +319,9 @@ def _audio_to_wav16k(src_path: str, dst_path: str) -> bool:
                 dst_path,
             ],
             check=True,
-            capture_output=True,
-            text=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             timeout=40,
         )
         return True
@@ -118,6 +329,52 @@ def _audio_to_wav16k(src_path: str, dst_path: str) -> bool:
         return False
 
 
+def _ffmpeg_oneshot(src_path: str, dst_path: str) -> tuple[float | None, float | None, bool]:
+    """Single decode pass: (duration_s, lufs_i, wrote_wav16k).
+
+    Fuses _ffprobe_duration_s + _ffmpeg_lufs + _audio_to_wav16k: ebur128 runs on
+    one output while the 16 kHz mono WAV is written from the same decoded input,
+    and duration/loudness are parsed from the one stderr log. Only the WAV
+    output is truncated to _FEATURE_MAX_S; duration and LUFS cover the full clip.
+    """
+    try:
+        if not _FFMPEG:
+            return None, None, False
+        rc, dur, lufs = _ffmpeg_scan(
+            [
+                _FFMPEG,
+                "-hide_banner",
+                "-stats",
+                "-y",
+                "-i",
+                src_path,
+                "-filter_complex",
+                "[0:a]ebur128=framelog=quiet[a1]",
+                "-map",
+                "[a1]",
+                "-f",
+                "null",
+                "-",
+                "-map",
+                "0:a",
+                "-ac",
+                "1",
+                "-ar",
+                "16000",
+                "-t",
+                str(_FEATURE_MAX_S),
+                "-f",
+                "wav",
+                dst_path,
+            ],
+            timeout=60,
+        )
+        wrote = rc == 0 and os.path.isfile(dst_path) and os.path.getsize(dst_path) > 44
+        return dur, lufs, wrote
+    except Exception:
+        return None, None, False
+
+
 def _wav_duration_s(wav_path: str) -> float | None:
     try:
         import wave
@@ -132,10 +389,85 @@ def _wav_duration_s(wav_path: str) -> float | None:
         return None
 
 
+@functools.lru_cache(maxsize=8)
+def _precompute(sr: int, frame: int):
+    """Per-(sr, frame) analysis constants: (hann window, rfft bin freqs, autocorr FFT length).
+
+    The arrays are shared across calls, so they are returned read-only.
+    """
+    import numpy as np
+
+    win = np.hanning(frame).astype(np.float32)
+    freqs = np.arange(frame // 2 + 1, dtype=np.float32) * (sr / frame)
+    win.setflags(write=False)
+    freqs.setflags(write=False)
+    # Linear (non-circular) autocorrelation needs n >= 2*frame - 1.
+    return win, freqs, _next_fast_len(2 * frame - 1)
+
+
+@functools.lru_cache(maxsize=1)
+def _halfband_taps():
+    """31-tap Hamming-windowed half-band lowpass (cutoff fs/4) for 2x decimation."""
+    import numpy as np
+
+    n = np.arange(-15, 16)
+    h = 0.5 * np.sinc(n / 2.0) * np.hamming(n.size)
+    h = (h / h.sum()).astype(np.float32)
+    h.setflags(write=False)
+    return h
+
+
+def _decimate2(x):
+    """Anti-aliased 2x downsample (numpy only)."""
+    import numpy as np
+
+    return np.convolve(x, _halfband_taps(), mode='same')[::2]
+
+
+@functools.lru_cache(maxsize=1)
+def _fft_funcs():
+    """(rfft, irfft) for the batched frame transforms.
+
+    scipy.fft (optional) spreads a batch across all cores with workers=-1;
+    numpy.fft is the single-threaded fallback. Both take (a, n=None, axis=-1).
+    """
+    try:
+        import scipy.fft as sfft
+
+        return functools.partial(sfft.rfft, workers=-1), functools.partial(sfft.irfft, workers=-1)
+    except ImportError:
+        import numpy.fft as nfft
+
+        return nfft.rfft, nfft.irfft
+
+
+def _next_fast_len(n: int) -> int:
+    """Smallest 5-smooth length >= n (the fast radix paths of pocketfft/scipy)."""
+    try:
+        from scipy.fft import next_fast_len
+
+        return int(next_fast_len(n, real=True))
+    except Exception:
+        pass
+    best = 1 << max(0, int(n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n:
+                m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
 def _extract_wav_features(wav_path: str) -> dict[str, Any]:
     """Extract lightweight acoustic features from a mono 16k WAV.
 
-    No external deps beyond numpy.
+    No external deps beyond numpy (scipy.fft is used for FFT sizing and
+    multi-core transforms when installed).
     Returns dict with keys like:
       - f0_hz_median
       - f0_hz_p10 / p90
@@ -151,55 +483,87 @@ def _extract_wav_features(wav_path: str) -> dict[str, Any]:
         with wave.open(wav_path, 'rb') as w:
             sr = int(w.getframerate() or 16000)
             n = int(w.getnframes() or 0)
-            b = w.readframes(n)
+            b = w.readframes(min(n, _FEATURE_MAX_S * sr))
         if not b:
             return {}
-        x = np.frombuffer(b, dtype=np.int16).astype(np.float32) / 32768.0
+        # int16 -> float32 in one pass into a single output buffer (no int->float
+        # copy followed by a second array for the scale).
+        x_i16 = np.frombuffer(b, dtype=np.int16)
+        x = np.empty(x_i16.shape, dtype=np.float32)
+        np.multiply(x_i16, np.float32(1.0 / 32768.0), out=x, casting='unsafe')
+        del b, x_i16
         if x.size < sr * 0.2:
             return {}
 
-        # RMS loudness proxy
-        rms = float(np.sqrt(np.mean(np.square(x)) + 1e-12))
+        # RMS loudness proxy (one dot-product reduction; no squared copy of the clip)
+        rms = float(np.sqrt(float(np.dot(x, x)) / x.size + 1e-12))
 
-        # Pitch via autocorrelation on voiced frames
         frame = int(0.04 * sr)   # 40ms
         hop = int(0.01 * sr)     # 10ms
+        win, freqs, _ = _precompute(sr, frame)
+
+        # Pitch via autocorrelation on voiced frames. f0 < 400 Hz, so the pitch
+        # pass runs at half rate (8 kHz for 16 kHz input): half the frame length,
+        # lags and FFT size. The centroid below keeps the full-rate signal.
+        xp, sr_p = x, sr
+        if sr >= 16000 and sr % 2 == 0:
+            xp, sr_p = _decimate2(x), sr // 2
+        frame_p = int(0.04 * sr_p)
+        hop_p = int(0.01 * sr_p)
         fmin, fmax = 70.0, 320.0
-        lag_min = int(sr / fmax)
-        lag_max = int(sr / fmin)
-
-        f0s = []
-        for i in range(0, len(x) - frame, hop):
-            seg = x[i:i+frame]
-            seg = seg - float(np.mean(seg))
-            e = float(np.mean(seg*seg))
-            if e < 1e-4:
-                continue
-            ac = np.correlate(seg, seg, mode='full')[frame-1:]
-            ac0 = float(ac[0]) if ac.size else 0.0
-            if ac0 <= 0:
-                continue
-            # normalize
-            ac = ac / (ac0 + 1e-9)
-            if lag_max >= ac.size:
-                continue
-            sl = ac[lag_min:lag_max]
-            j = int(np.argmax(sl))
-            peak = float(sl[j])
-            if peak < 0.25:
-                continue
-            lag = lag_min + j
-            f0 = float(sr / max(1, lag))
-            if fmin <= f0 <= fmax:
-                f0s.append(f0)
+        lag_min = int(sr_p / fmax)
+        lag_max = int(sr_p / fmin)
+        nfft = _precompute(sr_p, frame_p)[2]
+        rfft, irfft = _fft_funcs()
+
+        # Batched FFT autocorrelation (Wiener-Khinchin): one rfft/irfft over all
+        # frames instead of a per-frame O(frame^2) np.correlate.
+        f0s = np.empty(0, dtype=np.float32)
+        n_frames = len(range(0, len(xp) - frame_p, hop_p))
+        if n_frames > 0 and lag_max < frame_p:
+            frames = np.lib.stride_tricks.sliding_window_view(xp, frame_p)[::hop_p][:n_frames]
+            frames = frames - frames.mean(axis=1, keepdims=True)
+            # Energy gate before any FFT work: silent/quiet frames never get transformed.
+            energy = np.einsum('ij,ij->i', frames, frames) / frame_p
+            frames = frames[energy >= 1e-4]
+            F = rfft(frames, n=nfft, axis=1)
+            # |F|^2 as a real array: no conjugate temporary, no complex multiply.
+            psd = F.real * F.real + F.imag * F.imag
+            del F
+            # Only lags 0..lag_max are ever read: slice before normalizing.
+            ac = irfft(psd, n=nfft, axis=1)[:, :lag_max + 1]
+            ac0 = ac[:, 0]
+            keep = ac0 > 0
+            ac = ac[keep] / (ac0[keep, None] + 1e-9)
+            sl = ac[:, lag_min:lag_max]
+            if sl.size:
+                j = np.argmax(sl, axis=1)
+                rows = np.arange(sl.shape[0])
+                peak = sl[rows, j]
+                v = peak >= 0.25
+                j, rows = j[v], rows[v]
+                # Parabolic interpolation around the peak for sub-sample lag
+                # precision (integer lags are ~1 semitone off at 200 Hz / 16 kHz).
+                last = sl.shape[1] - 1
+                a = sl[rows, np.maximum(j - 1, 0)]
+                b = sl[rows, j]
+                c = sl[rows, np.minimum(j + 1, last)]
+                den = a - 2.0 * b + c
+                inner = (j > 0) & (j < last) & (np.abs(den) > 1e-12)
+                d = np.where(inner, 0.5 * (a - c) / np.where(inner, den, 1.0), 0.0)
+                lags = np.maximum(1.0, lag_min + j + d)
+                f0v = sr_p / lags
+                f0s = f0v[(f0v >= fmin) & (f0v <= fmax)]
 
         feat: dict[str, Any] = {"rms": rms}
-        if f0s:
-            f0a = np.array(f0s, dtype=np.float32)
-            f0_med = float(np.median(f0a))
+        if f0s.size:
+            f0a = f0s.astype(np.float32)
+            # One partition for all three order statistics.
+            q10, q50, q90 = np.quantile(f0a, [0.10, 0.50, 0.90])
+            f0_med = float(q50)
             feat["f0_hz_median"] = f0_med
-            feat["f0_hz_p10"] = float(np.percentile(f0a, 10))
-            feat["f0_hz_p90"] = float(np.percentile(f0a, 90))
+            feat["f0_hz_p10"] = float(q10)
+            feat["f0_hz_p90"] = float(q90)
             # bucket
             if f0_med < 140:
                 feat["pitch_bucket"] = "low"
@@ -211,19 +575,16 @@ def _extract_wav_features(wav_path: str) -> dict[str, Any]:
         # Spectral centroid for brightness
         # Compute on a small subset for speed
         try:
-            import numpy.fft as fft
-
-            centroids = []
-            win = np.hanning(frame).astype(np.float32)
-            freqs = (np.arange(frame//2 + 1, dtype=np.float32) * (sr / frame))
-            for i in range(0, len(x) - frame, hop*4):
-                seg = x[i:i+frame] * win
-                mag = np.abs(fft.rfft(seg)) + 1e-9
-                c = float((freqs * mag).sum() / mag.sum())
-                if c > 0:
-                    centroids.append(c)
-            if centroids:
-                c_med = float(np.median(np.array(centroids, dtype=np.float32)))
+            n_cframes = len(range(0, len(x) - frame, hop*4))
+            centroids = np.empty(0, dtype=np.float32)
+            if n_cframes > 0:
+                # One rfft over all windowed frames; centroid per frame is a GEMV.
+                cframes = np.lib.stride_tricks.sliding_window_view(x, frame)[::hop*4][:n_cframes] * win
+                mag = np.abs(rfft(cframes, axis=1)) + 1e-9
+                c = (mag @ freqs) / mag.sum(axis=1)
+                centroids = c[c > 0]
+            if centroids.size:
+                c_med = float(np.median(centroids.astype(np.float32)))
                 feat["centroid_hz_median"] = c_med
                 if c_med < 1700:
                     feat["brightness"] = "dark"
@@ -239,6 +600,77 @@ def _extract_wav_features(wav_path: str) -> dict[str, Any]:
         return {}
 
 
+def _json_loader():
+    try:
+        import msgspec
+
+        return msgspec.json.Decoder().decode
+    except ImportError:
+        return json.loads
+
+
+# JSON decode for LLM responses; msgspec when installed (optional), else stdlib.
+_loads = _json_loader()
+
+
+_JSON_DEC = json.JSONDecoder()
+
+
+def _extract_traits_json(txt: str) -> Any:
+    """Pull the JSON object out of an LLM reply; None if it does not parse.
+
+    Handles ```json fenced blocks and trailing text. Strict parse first; only on
+    failure are trailing commas stripped and the parse retried exactly once.
+    """
+    i0 = txt.find('{')
+    # Fast path: one decode from the first '{'; raw_decode stops at the end of
+    # the object, so fences and trailing chatter need no pre-cleaning.
+    if i0 != -1:
+        try:
+            return _JSON_DEC.raw_decode(txt, i0)[0]
+        except ValueError:
+            pass
+    # Prefer outermost {...} anywhere in the content
+    i1 = txt.rfind('}')
+    if i0 != -1 and i1 != -1 and i1 > i0:
+        raw = txt[i0 : i1 + 1]
+    else:
+        m = _RE_JSON_OUTER.search(txt)
+        raw = m.group(0) if m else txt
+    raw = raw.strip()
+    # strip code fences if they survived slicing
+    if raw.startswith('```'):
+        raw = _RE_FENCE_OPEN.sub("", raw)
+        raw = _RE_FENCE_CLOSE.sub("", raw).strip()
+    try:
+        return _loads(raw)
+    except Exception:
+        pass
+    try:
+        # Tolerate the common non-strict case: trailing commas before } or ]
+        return _loads(_RE_TRAILING_COMMA.sub(r"\1", raw))
+    except Exception:
+        return None
+
+
+def _json_dumper():
+    try:
+        import orjson
+
+        return lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except ImportError:
+        return lambda obj: json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# Compact JSON as UTF-8 bytes (request bodies); orjson when installed (optional).
+_dumpb = _json_dumper()
+
+
+def _dumps(obj: Any) -> str:
+    """Compact JSON text. Always str: psycopg2 would adapt bytes as bytea, not text."""
+    return _dumpb(obj).decode("utf-8")
+
+
 def _set_voice_traits_json(voice_id: str, voice_traits: dict[str, Any], measured: dict[str, Any] | None = None) -> None:
     conn = db_connect()
     try:
@@ -252,9 +684,10 @@ def _set_voice_traits_json(voice_id: str, voice_traits: dict[str, Any], measured
         }
         cur.execute(
             "UPDATE sf_voices SET voice_traits_json=%s, updated_at=%s WHERE id=%s",
-            (json.dumps(payload, separators=(",", ":")), now, voice_id),
+            (_dumps(payload), now, voice_id),
         )
         conn.commit()
+        invalidate_voices_cache()
     finally:
         try:
             conn.close()
@@ -286,61 +719,136 @@ def analyze_voice_metadata(
     if not sample_url:
         return {"ok": False, "error": "missing_sample_url"}
 
-    # Download + analyze sample audio
-    with tempfile.TemporaryDirectory(prefix="sf_voice_meta_") as td:
-        in_path = os.path.join(td, "sample")
-        wav_path = os.path.join(td, "sample_16k.wav")
-        try:
-            r = requests.get(sample_url, timeout=30)
+    # One executor per call: api_voices_create runs analyses in threads, and a
+    # shared pool would queue one call's classifier requests behind another's
+    # until they miss the _result deadline.
+    pool = _new_pool()
+    try:
+        with tempfile.TemporaryDirectory(prefix="sf_voice_meta_") as td:
+            return _analyze_voice_metadata(
+                pool,
+                td,
+                voice_id=voice_id,
+                engine=engine,
+                voice_ref=voice_ref,
+                sample_text=sample_text,
+                sample_url=sample_url,
+                tortoise_voice=tortoise_voice,
+                tortoise_gender=tortoise_gender,
+                tortoise_preset=tortoise_preset,
+                gateway_base=gateway_base,
+                headers=headers,
+            )
+    finally:
+        # Do not wait for stragglers (e.g. a losing remote analyze).
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _analyze_voice_metadata(
+    pool: ThreadPoolExecutor,
+    td: str,
+    *,
+    voice_id: str,
+    engine: str,
+    voice_ref: str,
+    sample_text: str,
+    sample_url: str,
+    tortoise_voice: str,
+    tortoise_gender: str,
+    tortoise_preset: str,
+    gateway_base: str,
+    headers: dict[str, str],
+) -> dict[str, Any]:
+    measured = _meta_cache_get(sample_url)
+
+    # Fire the independent Tinybox calls as early as possible; results are
+    # collected where used. Prefer remote analysis (Tinybox) via gateway:
+    # cloud containers often lack ffmpeg.
+    f_analyze = None
+    if measured is None:
+        f_analyze = pool.submit(_post_json, gateway_base + '/v1/audio/analyze', {'url': sample_url}, headers)
+
+    # Download the sample once: it feeds the local analysis and the age/gender
+    # classifiers alike.
+    in_path = os.path.join(td, "sample")
+    wav_path = os.path.join(td, "sample_16k.wav")
+    download_err: Exception | None = None
+    try:
+        # Stream to disk: no full in-memory copy of the sample.
+        with _HTTP.get(sample_url, stream=True, timeout=30) as r:
             r.raise_for_status()
+            r.raw.decode_content = True
             with open(in_path, "wb") as f:
-                f.write(r.content)
-        except Exception as e:
-            return {"ok": False, "error": f"download_failed: {type(e).__name__}: {str(e)[:160]}"}
+                shutil.copyfileobj(r.raw, f, length=1 << 20)
+    except Exception as e:
+        download_err = e
+    if download_err is not None and measured is None:
+        return {"ok": False, "error": f"download_failed: {type(download_err).__name__}: {str(download_err)[:160]}"}
 
-        # Prefer remote analysis (Tinybox) via gateway: cloud containers often lack ffmpeg.
-        dur = _ffprobe_duration_s(in_path)
-        lufs = _ffmpeg_lufs(in_path)
+    # Cached measurements but no public download: fall back to the Spaces fetch.
+    audio_b64 = _file_audio_b64(in_path) if download_err is None else _sample_audio_b64(sample_url)
+    audio_body = {'audio_b64': audio_b64} if audio_b64 else {'url': sample_url}
+    f_age = pool.submit(_post_json, gateway_base + '/v1/audio/age', audio_body, headers)
+    f_gender = None
+    if (str(tortoise_gender or '').strip()[:16].lower() or 'unknown') == 'unknown':
+        f_gender = pool.submit(_post_json, gateway_base + '/v1/audio/gender', audio_body, headers)
 
+    # Analyze sample audio (cache miss only)
+    if measured is None:
+        dur = lufs = None
         feats: dict[str, Any] = {}
+        have_wav = False
 
-        # 1) Try remote analyze first (best)
-        try:
-            ra = requests.post(
-                gateway_base + '/v1/audio/analyze',
-                json={'url': sample_url},
-                headers=headers,
-                timeout=120,
-            )
-            if int(getattr(ra, 'status_code', 0) or 0) == 200:
-                j = {}
-                try:
-                    j = ra.json()
-                except Exception:
-                    j = {}
-                if isinstance(j, dict) and j.get('ok'):
+        # If the remote analyze already answered during the download with
+        # everything we need, skip the local ffmpeg pass entirely.
+        if f_analyze is not None and f_analyze.done():
+            j = _result(f_analyze)
+            jf = j.get('features')
+            if j.get('ok') and isinstance(jf, dict) and jf and j.get('duration_s') is not None and j.get('lufs_i') is not None:
+                dur, lufs, feats = j['duration_s'], j['lufs_i'], jf
+                f_analyze = None
+
+        if not feats:
+            # One ffmpeg pass: duration + LUFS + the 16 kHz WAV for local fallback.
+            dur, lufs, have_wav = _ffmpeg_oneshot(in_path, wav_path)
+
+        # Race remote analyze (Tinybox) against local extraction: the first
+        # one to come back with features wins, so a slow gateway no longer
+        # holds up a sample we can already measure locally.
+        f_local = pool.submit(_extract_wav_features, wav_path) if have_wav else None
+        pending = {f for f in (f_analyze, f_local) if f is not None}
+        deadline = time.monotonic() + 130
+        while pending and not feats:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            if f_analyze in done:
+                j = _result(f_analyze)
+                if j.get('ok'):
                     dur = j.get('duration_s') if j.get('duration_s') is not None else dur
                     lufs = j.get('lufs_i') if j.get('lufs_i') is not None else lufs
                     feats = j.get('features') if isinstance(j.get('features'), dict) else feats
-        except Exception:
-            pass
+            if f_local in done and not feats:
+                feats = _result(f_local)
+                if feats and dur is None:
+                    # The WAV is capped at _FEATURE_MAX_S, so it only gives the
+                    # real length for shorter samples.
+                    wd = _wav_duration_s(wav_path)
+                    if wd is not None and wd < _FEATURE_MAX_S:
+                        dur = wd
+        if f_local is not None:
+            f_local.cancel()
 
-        # 2) Fallback: local extraction if tools exist
-        try:
-            if not feats and _audio_to_wav16k(in_path, wav_path):
-                feats = _extract_wav_features(wav_path) or {}
-                if dur is None:
-                    dur = _wav_duration_s(wav_path)
-        except Exception:
-            feats = feats or {}
-
-    measured = {
-        "duration_s": dur,
-        "lufs_i": lufs,
-        "features": feats or {},
-        # Note: engine + voice_ref are already stored on sf_voices; avoid duplicating here.
-        # (Same for tortoise hints — those live in provider/voice fields.)
-    }
+        measured = {
+            "duration_s": dur,
+            "lufs_i": lufs,
+            "features": feats or {},
+            # Note: engine + voice_ref are already stored on sf_voices; avoid duplicating here.
+            # (Same for tortoise hints — those live in provider/voice fields.)
+        }
+        # Only cache real measurements so a transient failure is retried next time.
+        if feats or dur is not None:
+            _meta_cache_put(sample_url, measured)
 
     # LLM: use measured audio features + known engine params.
     # IMPORTANT: We do NOT ask the model to decide gender; we keep it unknown unless sourced from provider hints.
@@ -368,96 +876,73 @@ def analyze_voice_metadata(
         },
     }
 
+    # Keyed on the whole prompt (+ model), so any input that reaches the LLM
+    # (tortoise hints, full sample_text, measurements) changes the key.
+    llm_key = "llm:" + json.dumps([_LLM_MODEL, prompt], sort_keys=True, separators=(",", ":"), default=str)
     try:
-        # Use the same rule as gemma: single user message only.
-        r = requests.post(
-            gateway_base + "/v1/llm",
-            json={
-                "model": "google/gemma-2-9b-it",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": "Return ONLY strict JSON matching the schema.\n\n" + json.dumps(prompt, separators=(",", ":")),
-                    }
-                ],
-                "temperature": 0.2,
-                "max_tokens": 220,
-            },
-            headers=headers,
-            timeout=90,
-        )
+        traits = _meta_cache_get(llm_key)
+        if traits is None:
+            # Use the same rule as gemma: single user message only.
+            r = _HTTP.post(
+                gateway_base + "/v1/llm",
+                data=_dumpb({
+                    "model": _LLM_MODEL,
+                    "messages": [
+                        {
+                            "role": "user",
+                            "content": "Return ONLY strict JSON matching the schema.\n\n" + _dumps(prompt),
+                        }
+                    ],
+                    "temperature": 0.2,
+                    "max_tokens": 220,
+                }),
+                headers={**headers, "Content-Type": "application/json"},
+                timeout=90,
+            )
 
-        # Robust parse: gateway occasionally returns HTML/plaintext errors.
-        status = int(getattr(r, "status_code", 0) or 0)
-        raw_txt = ""
-        try:
-            raw_txt = r.text or ""
-        except Exception:
+            # Robust parse: gateway occasionally returns HTML/plaintext errors.
+            status = int(getattr(r, "status_code", 0) or 0)
             raw_txt = ""
+            try:
+                raw_txt = r.text or ""
+            except Exception:
+                raw_txt = ""
 
-        if status < 200 or status >= 300:
-            return {
-                "ok": False,
-                "error": f"llm_http_{status}",
-                "detail": (raw_txt[:400] if raw_txt else ""),
-                "measured": measured,
-            }
-
-        try:
-            j = json.loads(raw_txt) if raw_txt else {}
-        except Exception:
-            return {
-                "ok": False,
-                "error": "llm_non_json",
-                "detail": (raw_txt[:400] if raw_txt else ""),
-                "measured": measured,
-            }
-
-        txt = ""
-        try:
-            txt = str((j.get("choices") or [{}])[0].get("message", {}).get("content") or "").strip()
-        except Exception:
-            txt = ""
-        if not txt:
-            return {"ok": False, "error": "llm_empty", "measured": measured}
-        # Extract JSON (handle ```json fenced blocks and trailing text)
-        import re
-
-        raw = ''
-        try:
-            # Prefer outermost {...} anywhere in the content
-            i0 = txt.find('{')
-            i1 = txt.rfind('}')
-            if i0 != -1 and i1 != -1 and i1 > i0:
-                raw = txt[i0 : i1 + 1]
-            else:
-                m = re.search(r"\{[\s\S]*\}", txt)
-                raw = m.group(0) if m else txt
-        except Exception:
-            raw = txt
+            if status < 200 or status >= 300:
+                return {
+                    "ok": False,
+                    "error": f"llm_http_{status}",
+                    "detail": (raw_txt[:400] if raw_txt else ""),
+                    "measured": measured,
+                }
 
-        # Tolerate common non-strict JSON issues (trailing commas)
-        raw2 = raw
-        try:
-            raw2 = raw2.strip()
-            # strip code fences if they survived slicing
-            if raw2.startswith('```'):
-                raw2 = re.sub(r"^```[a-zA-Z0-9_-]*\s*", "", raw2)
-                raw2 = re.sub(r"```\s*$", "", raw2).strip()
-            # remove trailing commas before } or ]
-            raw2 = re.sub(r",\s*([}\]])", r"\1", raw2)
-        except Exception:
-            raw2 = raw
+            try:
+                j = _loads(raw_txt) if raw_txt else {}
+            except Exception:
+                return {
+                    "ok": False,
+                    "error": "llm_non_json",
+                    "detail": (raw_txt[:400] if raw_txt else ""),
+                    "measured": measured,
+                }
 
-        try:
-            traits = json.loads(raw2)
-        except Exception:
-            return {
-                "ok": False,
-                "error": "llm_bad_output",
-                "detail": (txt[:400] if txt else ""),
-                "measured": measured,
-            }
+            txt = ""
+            try:
+                txt = str((j.get("choices") or [{}])[0].get("message", {}).get("content") or "").strip()
+            except Exception:
+                txt = ""
+            if not txt:
+                return {"ok": False, "error": "llm_empty", "measured": measured}
+            traits = _extract_traits_json(txt)
+            if traits is None:
+                return {
+                    "ok": False,
+                    "error": "llm_bad_output",
+                    "detail": (txt[:400] if txt else ""),
+                    "measured": measured,
+                }
+            if isinstance(traits, dict):
+                _meta_cache_put(llm_key, traits)
         if not isinstance(traits, dict):
             return {"ok": False, "error": "llm_bad_json_shape", "measured": measured}
 
@@ -480,42 +965,23 @@ def analyze_voice_metadata(
 
         # Age: prefer dedicated regressor endpoint (Tinybox) when available.
         try:
-            audio_b64 = None
-            try:
-                from .spaces_upload import fetch_public_url_bytes
-                bb, _ct = fetch_public_url_bytes(sample_url)
-                audio_b64 = base64.b64encode(bb).decode('ascii')
-            except Exception:
-                audio_b64 = None
-
-            ar = requests.post(
-                gateway_base + '/v1/audio/age',
-                json=({'audio_b64': audio_b64} if audio_b64 else {'url': sample_url}),
-                headers=headers,
-                timeout=120,
-            )
-            if int(getattr(ar, 'status_code', 0) or 0) == 200:
-                aj = {}
+            aj = _result(f_age)
+            if aj.get('ok') and aj.get('age_years') is not None:
                 try:
-                    aj = ar.json()
+                    agey = float(aj.get('age_years'))
                 except Exception:
-                    aj = {}
-                if isinstance(aj, dict) and aj.get('ok') and aj.get('age_years') is not None:
-                    try:
-                        agey = float(aj.get('age_years'))
-                    except Exception:
-                        agey = None
-                    if agey is not None:
-                        # bucket
-                        if agey < 13:
-                            out_traits['age'] = 'child'
-                        elif agey < 20:
-                            out_traits['age'] = 'teen'
-                        elif agey < 60:
-                            out_traits['age'] = 'adult'
-                        else:
-                            out_traits['age'] = 'elder'
-                        measured['age_years'] = agey
+                    agey = None
+                if agey is not None:
+                    # bucket
+                    if agey < 13:
+                        out_traits['age'] = 'child'
+                    elif agey < 20:
+                        out_traits['age'] = 'teen'
+                    elif agey < 60:
+                        out_traits['age'] = 'adult'
+                    else:
+                        out_traits['age'] = 'elder'
+                    measured['age_years'] = agey
         except Exception:
             pass
 
@@ -535,7 +1001,15 @@ def analyze_voice_metadata(
             pass
         tone = traits.get("tone")
         if isinstance(tone, list):
-            out_traits["tone"] = [_norm(x, 40) for x in tone if _norm(x, 40)][:8]
+            # One _norm per tag; stop at the 8th non-empty one.
+            tags: list[str] = []
+            for x in tone:
+                t = _norm(x, 40)
+                if t:
+                    tags.append(t)
+                    if len(tags) == 8:
+                        break
+            out_traits["tone"] = tags
 
         # Add brightness tag from spectral centroid
         try:
@@ -556,30 +1030,11 @@ def analyze_voice_metadata(
         # 2) classifier via gateway
         if out_traits["gender"] in ("", "unknown"):
             try:
-                audio_b64 = None
-                try:
-                    from .spaces_upload import fetch_public_url_bytes
-                    bb, _ct = fetch_public_url_bytes(sample_url)
-                    audio_b64 = base64.b64encode(bb).decode('ascii')
-                except Exception:
-                    audio_b64 = None
-
-                gr = requests.post(
-                    gateway_base + '/v1/audio/gender',
-                    json=({'audio_b64': audio_b64} if audio_b64 else {'url': sample_url}),
-                    headers=headers,
-                    timeout=120,
-                )
-                if int(getattr(gr, 'status_code', 0) or 0) == 200:
-                    gj = {}
-                    try:
-                        gj = gr.json()
-                    except Exception:
-                        gj = {}
-                    if isinstance(gj, dict) and gj.get('ok'):
-                        g = str(gj.get('gender') or 'unknown').strip().lower()
-                        if g in ('male','female'):
-                            out_traits['gender'] = g
+                gj = _result(f_gender)
+                if gj.get('ok'):
+                    g = str(gj.get('gender') or 'unknown').strip().lower()
+                    if g in ('male','female'):
+                        out_traits['gender'] = g
             except Exception:
                 pass
 
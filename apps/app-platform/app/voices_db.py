@@ -1,34 +1,90 @@
 from __future__ import annotations
 
-import json
+import os
 import re
+import string
+import threading
 import time
+from collections import OrderedDict
 from typing import Any
 
 
 def _now() -> int:
-    return int(time.time())
+    return time.time_ns() // 1_000_000_000
 
 
+# Reference pattern; validate_voice_id checks the same rule with set lookups.
 _ID_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+_ID_FIRST = frozenset(string.ascii_lowercase + string.digits)
+_ID_CHARS = _ID_FIRST | frozenset("-_")
 
 
 def validate_voice_id(voice_id: str) -> str:
     vid = (voice_id or "").strip()
-    if not _ID_RE.match(vid):
+    if not (0 < len(vid) <= 64 and vid[0] in _ID_FIRST and _ID_CHARS.issuperset(vid)):
         raise ValueError(
             "Invalid id. Use 1-64 chars: lowercase letters, digits, '-' or '_' (must start with letter/digit)."
         )
     return vid
 
 
-def voices_init(conn) -> None:
-    cur = conn.cursor()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
+# Short-TTL read cache for get_voice_db / list_voices_db: voices change rarely
+# but are read on most page loads. Writes through this module (and the raw
+# sf_voices writes in main.py / voice_meta.py) call invalidate_voices_cache();
+# the TTL bounds staleness for writes from other processes (uvicorn workers,
+# the forked voice_meta job). SF_VOICES_CACHE_TTL_S=0 disables it.
+try:
+    _CACHE_TTL_S = float(os.environ.get("SF_VOICES_CACHE_TTL_S", "5") or "5")
+except Exception:
+    _CACHE_TTL_S = 5.0
+_CACHE_MAX = 512
+_CACHE: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _cache_get(key: tuple) -> Any:
+    if _CACHE_TTL_S <= 0:
+        return None
+    with _CACHE_LOCK:
+        hit = _CACHE.get(key)
+        if hit is None:
+            return None
+        if hit[0] < time.monotonic():
+            del _CACHE[key]
+            return None
+        _CACHE.move_to_end(key)
+        return hit[1]
+
+
+def _cache_put(key: tuple, value: Any) -> None:
+    if _CACHE_TTL_S <= 0:
+        return
+    with _CACHE_LOCK:
+        _CACHE[key] = (time.monotonic() + _CACHE_TTL_S, value)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > _CACHE_MAX:
+            _CACHE.popitem(last=False)
+
+
+def invalidate_voices_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def _reinit_after_fork() -> None:
+    global _CACHE_LOCK
+    _CACHE_LOCK = threading.Lock()
+    _CACHE.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
 
+# Connections come from db.db_connect, which sets statement_timeout once per
+# pooled session; the functions below do not repeat it per call.
+def voices_init(conn) -> None:
+    cur = _cur(conn)
     cur.execute(
         """
 CREATE TABLE IF NOT EXISTS sf_voices (
@@ -59,68 +115,124 @@ CREATE TABLE IF NOT EXISTS sf_voices (
     conn.commit()
 
 
-def list_voices_db(conn, limit: int = 500) -> list[dict[str, Any]]:
-    cur = conn.cursor()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
+# Hot single-row statements, PREPAREd once per pooled session (see _execute).
+# name -> (server-side SQL with $n params, plain SQL with %s params)
+_VOICE_KEYS = (
+    "id",
+    "engine",
+    "voice_ref",
+    "display_name",
+    "color_hex",
+    "enabled",
+    "sample_text",
+    "sample_url",
+    "voice_traits_json",
+    "debut",
+    "created_at",
+    "updated_at",
+)
+_VOICE_COLS = ",".join(_VOICE_KEYS)
+_PREPARED = {
+    "sf_voice_get": (
+        "SELECT " + _VOICE_COLS + " FROM sf_voices WHERE id=$1",
+        "SELECT " + _VOICE_COLS + " FROM sf_voices WHERE id=%s",
+    ),
+    "sf_voice_set_enabled": (
+        "UPDATE sf_voices SET enabled=$1, updated_at=$2 WHERE id=$3 RETURNING " + _VOICE_COLS,
+        "UPDATE sf_voices SET enabled=%s, updated_at=%s WHERE id=%s RETURNING " + _VOICE_COLS,
+    ),
+    "sf_voice_delete": (
+        "DELETE FROM sf_voices WHERE id=$1",
+        "DELETE FROM sf_voices WHERE id=%s",
+    ),
+}
 
-    cur.execute(
-        "SELECT id,engine,voice_ref,display_name,color_hex,enabled,sample_text,sample_url,voice_traits_json,debut,updated_at "
-        "FROM sf_voices ORDER BY updated_at DESC LIMIT %s",
-        (int(limit),),
-    )
-    rows = cur.fetchall()
-    out = []
-    for r in rows:
-        out.append(
-            {
-                "id": r[0],
-                "engine": r[1] or "",
-                "voice_ref": r[2] or "",
-                "display_name": r[3] or "",
-                "color_hex": r[4] or "",
-                "enabled": bool(r[5]),
-                "sample_text": r[6] or "",
-                "sample_url": r[7] or "",
-                "voice_traits_json": r[8] or "",
-                "debut": bool(r[9]) if r[9] is not None else False,
-                "updated_at": r[10],
-            }
-        )
-    return out
 
+def _cur(conn):
+    """The pooled session's long-lived cursor, or a fresh one for other connections.
 
-def get_voice_db(conn, voice_id: str) -> dict[str, Any]:
-    cur = conn.cursor()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
+    Safe to share: a pooled connection is used by one thread at a time and
+    every function here consumes its results before returning.
+    """
+    cur = getattr(conn, "sf_cursor", None)
+    if cur is None or cur.closed:
+        return conn.cursor()
+    return cur
 
-    cur.execute(
-        "SELECT id,engine,voice_ref,display_name,color_hex,enabled,sample_text,sample_url,voice_traits_json,debut,created_at,updated_at "
-        "FROM sf_voices WHERE id=%s",
-        (voice_id,),
-    )
+
+def _execute(conn, cur, name: str, params: tuple) -> None:
+    """Run a _PREPARED statement: PREPARE on first use per session, then EXECUTE.
+
+    Connections without session bookkeeping (not from db.db_connect's pool)
+    fall back to the plain statement.
+    """
+    server_sql, plain_sql = _PREPARED[name]
+    prepared = getattr(conn, "sf_prepared", None)
+    if prepared is None:
+        cur.execute(plain_sql, params)
+        return
+    if name not in prepared:
+        cur.execute(f"PREPARE {name} AS {server_sql}")
+        prepared.add(name)
+    cur.execute(f"EXECUTE {name} (" + ",".join(["%s"] * len(params)) + ")", params)
+
+
+# Every selected column is NOT NULL with a default (see voices_init / db_init
+# migrations), so rows map straight to dicts with no per-field coercion.
+_LIST_COLS = (
+    "id",
+    "engine",
+    "voice_ref",
+    "display_name",
+    "color_hex",
+    "enabled",
+    "sample_text",
+    "sample_url",
+    "voice_traits_json",
+    "debut",
+    "updated_at",
+)
+_LIST_SQL = "SELECT " + ",".join(_LIST_COLS) + " FROM sf_voices ORDER BY updated_at DESC LIMIT %s"
+
+
+def list_voices_db(conn, limit: int = 500) -> list[dict[str, Any]]:
+    key = ("list", int(limit))
+    hit = _cache_get(key)
+    if hit is not None:
+        return [dict(v) for v in hit]
+    cur = _cur(conn)
+    cur.execute(_LIST_SQL, (int(limit),))
+    cols = _LIST_COLS
+    out = [dict(zip(cols, r)) for r in cur.fetchall()]
+    _cache_put(key, [dict(v) for v in out])
+    return out
+
+
+def get_voice_db(conn, voice_id: str, use_cache: bool = True) -> dict[str, Any]:
+    """One voice row. Pass use_cache=False on read-before-write paths: the
+    cache can hold a row up to SF_VOICES_CACHE_TTL_S old when another
+    process wrote it."""
+    key = ("get", voice_id)
+    if use_cache:
+        hit = _cache_get(key)
+        if hit is not None:
+            return dict(hit)
+    cur = _cur(conn)
+    _execute(conn, cur, "sf_voice_get", (voice_id,))
     r = cur.fetchone()
     if not r:
         raise FileNotFoundError("not found")
-    return {
-        "id": r[0],
-        "engine": r[1] or "",
-        "voice_ref": r[2] or "",
-        "display_name": r[3] or "",
-        "color_hex": r[4] or "",
-        "enabled": bool(r[5]),
-        "sample_text": r[6] or "",
-        "sample_url": r[7] or "",
-        "voice_traits_json": r[8] or "",
-        "debut": bool(r[9]) if r[9] is not None else False,
-        "created_at": r[10],
-        "updated_at": r[11],
-    }
+    out = _voice_from_row(r)
+    _cache_put(key, dict(out))
+    return out
+
+
+def _voice_from_row(r) -> dict[str, Any]:
+    """Row in _VOICE_COLS order -> the dict shape get_voice_db returns.
+
+    Columns are NOT NULL with defaults (as for _LIST_COLS), so no coercion.
+    """
+    return dict(zip(_VOICE_KEYS, r))
 
 
 def upsert_voice_db(
@@ -135,12 +247,7 @@ def upsert_voice_db(
     sample_url: str = "",
 ) -> None:
     now = _now()
-    cur = conn.cursor()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
-
+    cur = _cur(conn)
     cur.execute(
         """
 INSERT INTO sf_voices (id,engine,voice_ref,display_name,color_hex,enabled,sample_text,sample_url,voice_traits_json,created_at,updated_at)
@@ -155,7 +262,7 @@ ON CONFLICT (id) DO UPDATE SET
   sample_url=EXCLUDED.sample_url,
   voice_traits_json=COALESCE(NULLIF(EXCLUDED.voice_traits_json,''), sf_voices.voice_traits_json),
   updated_at=EXCLUDED.updated_at;
-""", 
+""",
         (
             voice_id,
             str(engine or ""),
@@ -171,27 +278,38 @@ ON CONFLICT (id) DO UPDATE SET
         ),
     )
     conn.commit()
+    invalidate_voices_cache()
 
 
-def set_voice_enabled_db(conn, voice_id: str, enabled: bool) -> None:
-    cur = conn.cursor()
+def set_voice_enabled_db(conn, voice_id: str, enabled: bool) -> dict[str, Any] | None:
+    """Toggle a voice; returns the updated row (as get_voice_db) or None if missing."""
+    cur = _cur(conn)
     now = _now()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
+    _execute(conn, cur, "sf_voice_set_enabled", (bool(enabled), now, voice_id))
+    r = cur.fetchone()
+    conn.commit()
+    invalidate_voices_cache()
+    return _voice_from_row(r) if r else None
+
+
+def set_voice_sample_db(conn, voice_id: str, sample_text: str, sample_url: str) -> None:
+    """Store a regenerated sample without waiting for the WAL flush.
+
+    The sample is rebuilt on demand, so losing the last write in a crash is
+    harmless; synchronous_commit=off (this transaction only) skips the fsync.
+    """
+    cur = _cur(conn)
     cur.execute(
-        "UPDATE sf_voices SET enabled=%s, updated_at=%s WHERE id=%s",
-        (bool(enabled), now, voice_id),
+        "SET LOCAL synchronous_commit = off;"
+        "UPDATE sf_voices SET sample_text=%s, sample_url=%s, updated_at=%s WHERE id=%s",
+        (str(sample_text or ""), str(sample_url or ""), _now(), voice_id),
     )
     conn.commit()
+    invalidate_voices_cache()
 
 
 def delete_voice_db(conn, voice_id: str) -> None:
-    cur = conn.cursor()
-    try:
-        cur.execute("SET statement_timeout = '5000'")
-    except Exception:
-        pass
-    cur.execute("DELETE FROM sf_voices WHERE id=%s", (voice_id,))
+    cur = _cur(conn)
+    _execute(conn, cur, "sf_voice_delete", (voice_id,))
     conn.commit()
+    invalidate_voices_cache()
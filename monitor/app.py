@@ -2,18 +2,36 @@
 import argparse
 import ipaddress
 import json
+import os
+import queue
 import sqlite3
 import re
+import threading
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from http import HTTPStatus
 from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs, unquote
 
 
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]")
+_PCT_RE = re.compile(r"\d+%\|")  # tqdm progress bars
+_INET_RE = re.compile(r"inet\s+(\d+\.\d+\.\d+\.\d+)/(\d+)")
+
+# do_GET routes
+_VOICE_DEMO_RE = re.compile(r"^/api/voice/demo/([a-zA-Z0-9_-]+)/([a-zA-Z0-9_-]+)$")
+_API_JOB_RE = re.compile(r"^/api/job/([a-zA-Z0-9_-]+)$")
+_API_SFML_RE = re.compile(r"^/api/sfml/([a-zA-Z0-9_-]+)$")
+_SFML_RE = re.compile(r"^/sfml/([a-zA-Z0-9_-]+)$")
+_AUDIO_RE = re.compile(r"^/audio/([a-zA-Z0-9_-]+)$")
+_DL_RE = re.compile(r"^/dl/([a-zA-Z0-9_-]+)$")
+
+
 def slugify_title(t: str) -> str:
     # match Storyforge output naming: non-alnum -> underscore
-    return re.sub(r"[^A-Za-z0-9]", "_", (t or "").strip())
+    return _SLUG_RE.sub("_", (t or "").strip())
 
 
 def now_ts():
@@ -30,8 +48,8 @@ def db_default_path(root: Path) -> Path:
     return root / "monitor.db"
 
 
-def db_connect(db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(db_path))
+def db_connect(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     # Better concurrency for threaded server
     conn.execute("PRAGMA journal_mode=WAL")
@@ -39,7 +57,16 @@ def db_connect(db_path: Path) -> sqlite3.Connection:
     return conn
 
 
+# db file -> PRAGMA schema_version seen after db_init last ran on it. The
+# version only moves when some connection changes the schema, so a match
+# means every CREATE/ALTER below would be a no-op.
+_DB_SCHEMA_VERSIONS: dict[str, int] = {}
+
+
 def db_init(conn: sqlite3.Connection) -> None:
+    db_file = conn.execute("PRAGMA database_list").fetchone()[2]  # '' for :memory:
+    if db_file and _DB_SCHEMA_VERSIONS.get(db_file) == conn.execute("PRAGMA schema_version").fetchone()[0]:
+        return
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS jobs (
@@ -52,19 +79,57 @@ def db_init(conn: sqlite3.Connection) -> None:
         );
         """
     )
-    # schema migrations
-    cols = {r[1] for r in conn.execute("PRAGMA table_info(jobs)").fetchall()}
-    if "state" not in cols: conn.execute("ALTER TABLE jobs ADD COLUMN state TEXT")
-    if "finished_at" not in cols: conn.execute("ALTER TABLE jobs ADD COLUMN finished_at INTEGER")
-    if "aborted_at" not in cols: conn.execute("ALTER TABLE jobs ADD COLUMN aborted_at INTEGER")
-    if "segments_done" not in cols: conn.execute("ALTER TABLE jobs ADD COLUMN segments_done INTEGER")
+    # schema migrations (a column that already exists raises "duplicate column")
+    for ddl in (
+        "ALTER TABLE jobs ADD COLUMN state TEXT",
+        "ALTER TABLE jobs ADD COLUMN finished_at INTEGER",
+        "ALTER TABLE jobs ADD COLUMN aborted_at INTEGER",
+        "ALTER TABLE jobs ADD COLUMN segments_done INTEGER",
+    ):
+        try:
+            conn.execute(ddl)
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e):
+                raise
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_started_at ON jobs(started_at DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_state_started ON jobs(state, started_at DESC)")
     conn.execute("CREATE TABLE IF NOT EXISTS voice_ratings (engine TEXT NOT NULL, voice_id TEXT NOT NULL, rating INTEGER NOT NULL, updated_at INTEGER NOT NULL, PRIMARY KEY(engine, voice_id))")
     conn.commit()
+    if db_file:
+        _DB_SCHEMA_VERSIONS[db_file] = conn.execute("PRAGMA schema_version").fetchone()[0]
 
 
-def db_upsert_job(conn: sqlite3.Connection, meta: dict) -> None:
-    conn.execute(
-        """
+# Reused connections per db file. ThreadingHTTPServer starts a new thread per
+# request, so a threading.local cache would never be hit; a shared free-list
+# lets each request borrow an already-open, already-initialised connection.
+_DB_POOLS: dict[str, "queue.SimpleQueue[sqlite3.Connection]"] = {}
+_DB_READY: set[str] = set()
+_DB_LOCK = threading.Lock()
+
+
+@contextmanager
+def db_session(db_path: Path):
+    """Borrow a pooled connection; db_init runs once per db file per process."""
+    key = str(db_path)
+    with _DB_LOCK:
+        pool = _DB_POOLS.setdefault(key, queue.SimpleQueue())
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = db_connect(db_path, check_same_thread=False)
+        with _DB_LOCK:
+            if key not in _DB_READY:
+                db_init(conn)
+                _DB_READY.add(key)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        pool.put(conn)
+
+
+_JOB_UPSERT_SQL = """
         INSERT INTO jobs (id, title, sfml, started_at, total_segments, mp3)
         VALUES (?, ?, ?, ?, ?, ?)
         ON CONFLICT(id) DO UPDATE SET
@@ -73,22 +138,22 @@ def db_upsert_job(conn: sqlite3.Connection, meta: dict) -> None:
           started_at=excluded.started_at,
           total_segments=excluded.total_segments,
           mp3=excluded.mp3
-        """,
-        (
-            meta.get("id"),
-            meta.get("title") or meta.get("id") or "",
-            meta.get("sfml") or "",
-            int(meta.get("started_at", 0) or 0),
-            int(meta.get("total_segments", 0) or 0),
-            meta.get("mp3"),
-        ),
+        """
+
+
+def _job_row(meta: dict) -> tuple:
+    return (
+        meta.get("id"),
+        meta.get("title") or meta.get("id") or "",
+        meta.get("sfml") or "",
+        int(meta.get("started_at", 0) or 0),
+        int(meta.get("total_segments", 0) or 0),
+        meta.get("mp3"),
     )
-    # schema migrations
-    cols = {r[1] for r in conn.execute("PRAGMA table_info(jobs)").fetchall()}
-    if "state" not in cols: conn.execute("ALTER TABLE jobs ADD COLUMN state TEXT")
-    if "finished_at" not in cols: conn.execute("ALTER TABLE jobs ADD COLUMN finished_at INTEGER")
-    if "aborted_at" not in cols: conn.execute("ALTER TABLE jobs ADD COLUMN aborted_at INTEGER")
-    if "segments_done" not in cols: conn.execute("ALTER TABLE jobs ADD COLUMN segments_done INTEGER")
+
+
+def db_upsert_job(conn: sqlite3.Connection, meta: dict) -> None:
+    conn.execute(_JOB_UPSERT_SQL, _job_row(meta))
     conn.commit()
 
 
@@ -115,16 +180,31 @@ def migrate_jobs_json_to_db(root: Path, db_path: Path) -> int:
         conn.close()
         return 0
 
-    imported = 0
+    rows = []
     for p in sorted(jobs_dir.glob("*.json")):
         try:
             meta = json.loads(read_text(p))
             if not meta.get("id"):
                 meta["id"] = p.stem
-            db_upsert_job(conn, meta)
-            imported += 1
+            rows.append(_job_row(meta))
         except Exception:
             pass
+    # one transaction / one WAL sync for the whole import
+    try:
+        with conn:
+            conn.executemany(_JOB_UPSERT_SQL, rows)
+        imported = len(rows)
+    except Exception:
+        # some legacy row does not bind (e.g. a dict/list title or an int out
+        # of range): redo row by row and skip the bad ones, as before
+        imported = 0
+        for row in rows:
+            try:
+                with conn:
+                    conn.execute(_JOB_UPSERT_SQL, row)
+                imported += 1
+            except Exception:
+                pass
     conn.close()
     return imported
 
@@ -133,23 +213,21 @@ def job_status_light(root: Path, job_id: str) -> dict:
     """Lightweight status for list view (no cpu/gpu/log tail)."""
     tmp_root = root / "tmp"
 
-    conn = db_connect(db_default_path(root))
-    db_init(conn)
-    meta = db_get_job(conn, job_id)
-    conn.close()
+    with db_session(db_default_path(root)) as conn:
+        meta = db_get_job(conn, job_id)
     if not meta:
         return {"ok": False, "error": "job_not_found"}
 
-    started_at = int(meta.get("started_at", 0) or 0)
+    return _light_status(meta, find_tmp_job_dir(tmp_root, job_id))
+
+
+def _light_status(meta: dict, tmp_job: Path | None) -> dict:
+    """job_status_light body for an already-loaded job row + its tmp run dir."""
     total = int(meta.get("total_segments", 0) or 0)
 
-    job_base = tmp_root / job_id
-    tmp_job = find_tmp_job_dir(tmp_root, job_id)
     done = 0
     if tmp_job:
-        narr = tmp_job / "narr"
-        if narr.exists():
-            done = len(list(narr.glob("seg_*.wav")))
+        done = count_seg_wavs(tmp_job / "narr")
 
     mp3_path = None
     mp3 = meta.get("mp3")
@@ -158,7 +236,7 @@ def job_status_light(root: Path, job_id: str) -> dict:
         if cand.exists():
             mp3_path = cand
 
-    if mp3_path and mp3_path.exists() and total and done == 0:
+    if mp3_path and total and done == 0:
         done = total
 
     st = (meta.get("state") or "pending").lower()
@@ -169,22 +247,51 @@ def job_status_light(root: Path, job_id: str) -> dict:
         'last_activity_at': meta.get('finished_at') or meta.get('aborted_at') or None,
     }
 
-
     return {
         "ok": True,
         "progress": {"done": done, "total": total, "pct": (done/total*100.0) if total else None},
-        "mp3": str(mp3_path) if mp3_path and mp3_path.exists() else None,
+        "mp3": str(mp3_path) if mp3_path else None,
         "status": status,
     }
 
 
+def index_snapshot(root: Path, db_path: Path) -> list[dict]:
+    """All jobs with light status attached, for list views.
+
+    One SELECT and one scandir pass over tmp/ instead of a DB round trip and
+    a glob per job (job_status_light in a loop).
+    """
+    with db_session(db_path) as conn:
+        metas = db_list_jobs(conn)
+    run_dirs = scan_tmp_job_dirs(root / "tmp", {m.get("id") for m in metas})
+    for meta in metas:
+        st = _light_status(meta, run_dirs.get(meta.get("id")))
+        meta["status"] = st.get("status")
+        meta["mp3"] = st.get("mp3")
+        meta["progress"] = st.get("progress")
+    return metas
+
+
+# roster path -> (st_mtime_ns, parsed voices); re-parsed only when the file changes.
+_ROSTER_CACHE: dict[str, tuple[int, list[dict]]] = {}
 
 
 def load_tortoise_roster(repo_root: Path) -> list[dict]:
     """Parse manifests/tortoise_voice_roster.yaml without external deps."""
     path = repo_root / "manifests" / "tortoise_voice_roster.yaml"
-    if not path.exists():
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
         return []
+    hit = _ROSTER_CACHE.get(str(path))
+    if not hit or hit[0] != mtime_ns:
+        hit = (mtime_ns, _parse_tortoise_roster(path))
+        _ROSTER_CACHE[str(path)] = hit
+    # callers annotate entries (e.g. ratings), so hand out copies
+    return [dict(v) for v in hit[1]]
+
+
+def _parse_tortoise_roster(path: Path) -> list[dict]:
     items = []
     cur = None
     for raw in read_text(path).splitlines():
@@ -231,7 +338,8 @@ def voice_demo_text(voice_id: str, color: str) -> str:
         f"{color} speaking. Warm, quiet, and bedtime-friendly.",
         f"This is {color}. Let's make the night feel safe.",
     ]
-    idx = (sum(ord(c) for c in voice_id) % len(base))
+    # byte sum, not hash(): the pick must stay stable across restarts (demo mp3s are cached)
+    idx = sum(voice_id.encode()) % len(base)
     return base[idx]
 
 
@@ -250,7 +358,7 @@ def filter_log_tail(raw: str, max_lines: int = 60) -> str:
             continue
         if 'You should probably TRAIN this model' in s:
             continue
-        if re.search(r"\d+%\|", s):
+        if _PCT_RE.search(s):
             continue
         if s.startswith('Generating autoregressive samples') or s.startswith('Computing best candidates') or s.startswith('Transforming autoregressive outputs'):
             keep.append(s)
@@ -261,69 +369,143 @@ def filter_log_tail(raw: str, max_lines: int = 60) -> str:
     return "\n".join(keep[-max_lines:])
 
 
+# GPU stats come from one long-lived `nvidia-smi --loop-ms` process read by a
+# daemon thread; requests only read the latest snapshot.
+_GPU_QUERY = "--query-gpu=index,utilization.gpu,memory.used,memory.total,power.draw,temperature.gpu"
+_GPU_LATEST: list[dict] | None = None
+_GPU_READY = threading.Event()
+_GPU_LOCK = threading.Lock()
+_GPU_THREAD: threading.Thread | None = None
+
+
+def _parse_gpu_line(line: str) -> dict | None:
+    parts = [p.strip() for p in line.split(",")]
+    if len(parts) < 6:
+        return None
+    try:
+        return {
+            "index": int(parts[0]),
+            "util": float(parts[1]),
+            "mem_used": float(parts[2]),
+            "mem_total": float(parts[3]),
+            "power": float(parts[4]),
+            "temp": float(parts[5]),
+        }
+    except ValueError:
+        return None
+
+
+def _gpu_poller(interval_ms: int = 2000, max_backoff_s: float = 600.0) -> None:
+    global _GPU_LATEST
+    import subprocess
+
+    backoff = 5.0
+    while True:
+        try:
+            proc = subprocess.Popen(
+                ["nvidia-smi", _GPU_QUERY, "--format=csv,noheader,nounits", f"--loop-ms={interval_ms}"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+        except OSError:
+            # no nvidia-smi on this host: GPU stats stay unavailable (None) for good
+            _GPU_LATEST = None
+            _GPU_READY.set()
+            return
+        by_index: dict[int, dict] = {}
+        for line in proc.stdout:
+            g = _parse_gpu_line(line)
+            if g is None:
+                continue
+            by_index[g["index"]] = g
+            _GPU_LATEST = [by_index[k] for k in sorted(by_index)]
+            _GPU_READY.set()
+        proc.wait()
+        _GPU_LATEST = None
+        _GPU_READY.set()
+        # nvidia-smi exited. After a run that produced samples (driver hiccup)
+        # retry soon; if it keeps failing without output (no GPU / no driver)
+        # back off exponentially instead of respawning it every few seconds.
+        backoff = 5.0 if by_index else min(backoff * 2, max_backoff_s)
+        time.sleep(backoff)
+
+
 def gpu_stats():
     """Best-effort GPU stats (NVIDIA). Returns list[dict] or None."""
-    try:
-        import subprocess
+    global _GPU_THREAD
+    if _GPU_THREAD is None:
+        with _GPU_LOCK:
+            if _GPU_THREAD is None:
+                _GPU_THREAD = threading.Thread(target=_gpu_poller, name="gpu-poller", daemon=True)
+                _GPU_THREAD.start()
+    _GPU_READY.wait(1.0)  # only blocks until the first sample arrives
+    return _GPU_LATEST
 
-        out = subprocess.check_output(
-            [
-                "nvidia-smi",
-                "--query-gpu=index,utilization.gpu,memory.used,memory.total,power.draw,temperature.gpu",
-                "--format=csv,noheader,nounits",
-            ],
-            text=True,
-        )
-        g = []
-        for line in out.strip().splitlines():
-            parts = [p.strip() for p in line.split(",")]
-            if len(parts) >= 6:
-                g.append(
-                    {
-                        "index": int(parts[0]),
-                        "util": float(parts[1]),
-                        "mem_used": float(parts[2]),
-                        "mem_total": float(parts[3]),
-                        "power": float(parts[4]),
-                        "temp": float(parts[5]),
-                    }
-                )
-        return g
-    except Exception:
-        return None
 
+# Last /proc/stat sample as (idle, total) and the last result, shared across
+# request threads (a threading.local would start empty on every request).
+_CPU_PREV: tuple[int, int] | None = None
+_CPU_LAST: tuple[float, float | None] = (0.0, None)
+_CPU_LOCK = threading.Lock()
 
-def cpu_overall_pct() -> float | None:
-    """One-shot overall CPU utilization percent (best-effort)"""
-    try:
-        import subprocess
 
-        out = subprocess.check_output(["bash", "-lc", "LC_ALL=C top -b -n1 | head -n 5"], text=True)
-        # Examples:
-        # %Cpu(s):  3.0 us,  1.0 sy,  0.0 ni, 95.7 id,  0.1 wa,  0.0 hi,  0.1 si,  0.0 st
-        m = re.search(r"\b([0-9.]+)\s*id\b", out)
-        if not m:
+def cpu_overall_pct() -> float | None:
+    """Overall CPU utilization percent since the previous call (best-effort, cached 1s)"""
+    global _CPU_PREV, _CPU_LAST
+    with _CPU_LOCK:
+        now = time.monotonic()
+        if now - _CPU_LAST[0] < 1.0:
+            return _CPU_LAST[1]
+        try:
+            with open("/proc/stat", "rb") as f:
+                # cpu  user nice system idle iowait irq softirq steal ...
+                vals = [int(x) for x in f.readline().split()[1:9]]
+        except Exception:
             return None
-        idle = float(m.group(1))
-        return max(0.0, min(100.0, 100.0 - idle))
-    except Exception:
-        return None
+        idle = vals[3] + vals[4]
+        total = sum(vals)
+        prev_idle, prev_total = _CPU_PREV or (0, 0)
+        _CPU_PREV = (idle, total)
+        d_total = total - prev_total
+        if d_total <= 0:
+            pct = _CPU_LAST[1]
+        else:
+            pct = max(0.0, min(100.0, 100.0 * (1.0 - (idle - prev_idle) / d_total)))
+        _CPU_LAST = (now, pct)
+        return pct
+
+
+_MEM_TOTAL_KB: int | None = None  # MemTotal does not change while we run
+
+
+def _meminfo_field(data: bytes, key: bytes) -> int:
+    i = data.find(b"\n" + key + b":")
+    if i < 0:
+        if not data.startswith(key + b":"):
+            return 0
+        i = -1
+    j = data.find(b"\n", i + 1)
+    v = data[i + len(key) + 2 : j if j >= 0 else None].split()
+    return int(v[0]) if v and v[0].isdigit() else 0
+
+
+def meminfo_kb() -> tuple[int, int]:
+    """(MemTotal, MemAvailable) in kB from /proc/meminfo."""
+    global _MEM_TOTAL_KB
+    with open("/proc/meminfo", "rb") as f:
+        data = f.read(4096)
+    if not _MEM_TOTAL_KB:
+        _MEM_TOTAL_KB = _meminfo_field(data, b"MemTotal")
+    return _MEM_TOTAL_KB, _meminfo_field(data, b"MemAvailable")
 
 
 def cpu_stats():
     """Best-effort CPU/RAM stats (Linux)."""
     try:
-        # meminfo (kB)
-        mem = {}
-        for line in Path("/proc/meminfo").read_text().splitlines():
-            if ":" not in line:
-                continue
-            k, rest = line.split(":", 1)
-            v = rest.strip().split()[0]
-            if v.isdigit():
-                mem[k] = int(v)
-        mem_total = mem.get("MemTotal", 0) / 1024 / 1024
-        mem_avail = mem.get("MemAvailable", 0) / 1024 / 1024
+        mem_total_kb, mem_avail_kb = meminfo_kb()
+        mem_total = mem_total_kb / 1024 / 1024
+        mem_avail = mem_avail_kb / 1024 / 1024
         mem_used = max(0.0, mem_total - mem_avail)
         mem_pct = (mem_used / mem_total * 100.0) if mem_total else None
 
@@ -338,8 +520,9 @@ def cpu_stats():
             text=True,
         ).strip().splitlines()
 
+        cpu_pct = cpu_overall_pct()
         return {
-            "cpu_pct": round(cpu_overall_pct(), 1) if cpu_overall_pct() is not None else None,
+            "cpu_pct": round(cpu_pct, 1) if cpu_pct is not None else None,
             "mem_gb": {
                 "total": round(mem_total, 2),
                 "used": round(mem_used, 2),
@@ -365,7 +548,7 @@ def detect_allow_cidrs(root: Path):
 
         out = subprocess.check_output(["ip", "-o", "-f", "inet", "addr", "show"], text=True)
         for line in out.splitlines():
-            m = re.search(r"inet\s+(\d+\.\d+\.\d+\.\d+)/(\d+)", line)
+            m = _INET_RE.search(line)
             if not m:
                 continue
             ip = m.group(1)
@@ -381,27 +564,106 @@ def detect_allow_cidrs(root: Path):
     return nets
 
 
+def compile_allow_nets(nets) -> list[tuple[int, int, int]]:
+    """(version, network int, netmask int) per allowed net, for int-only matching."""
+    return sorted({(n.version, int(n.network_address), int(n.netmask)) for n in nets})
+
+
+def ip_allowed(ip: str, masks: list[tuple[int, int, int]]) -> bool:
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    a = int(addr)
+    return any(v == addr.version and (a & mask) == net for v, net, mask in masks)
+
+
+# sfml path -> (st_mtime_ns, spoken segment count)
+_SPOKEN_CACHE: dict[str, tuple[int, int]] = {}
+
+
 def count_spoken_segments(sfml_path: Path) -> int:
     try:
+        key = str(sfml_path)
+        mtime_ns = os.stat(key).st_mtime_ns
+        hit = _SPOKEN_CACHE.get(key)
+        if hit and hit[0] == mtime_ns:
+            return hit[1]
+        with open(key, "rb") as f:
+            data = f.read()
         n = 0
-        for ln in read_text(sfml_path).splitlines():
+        for ln in data.splitlines():
             s = ln.strip()
-            if not s or s.startswith("@"):  # directives
+            if not s or s.startswith(b"@"):  # directives
                 continue
-            if ":" in s:
+            if b":" in s:
                 n += 1
+        _SPOKEN_CACHE[key] = (mtime_ns, n)
         return n
     except Exception:
         return 0
 
 
-def find_tmp_job_dir(tmp_root: Path, job_id: str):
-    base = tmp_root / job_id
-    if not base.exists():
+def count_seg_wavs(narr: Path) -> int:
+    """Number of seg_*.wav files in narr (0 if it does not exist)."""
+    try:
+        with os.scandir(narr) as it:
+            return sum(1 for e in it if e.name.startswith("seg_") and e.name.endswith(".wav"))
+    except (FileNotFoundError, NotADirectoryError):
+        return 0
+
+
+# base dir -> (st_mtime_ns, names of its storyforge-* subdirs). Creating or
+# removing a run dir bumps the base mtime, so the listing is reused until then.
+_RUN_DIRS_CACHE: dict[str, tuple[int, list[str]]] = {}
+
+
+def _newest_run_dir(base: str) -> Path | None:
+    """Newest storyforge-* directory directly under base (by mtime)."""
+    try:
+        mtime_ns = os.stat(base).st_mtime_ns
+    except OSError:
         return None
-    cands = [p for p in base.glob("storyforge-*") if p.is_dir()]
-    cands = sorted(cands, key=lambda p: p.stat().st_mtime, reverse=True)
-    return cands[0] if cands else None
+    hit = _RUN_DIRS_CACHE.get(base)
+    if hit and hit[0] == mtime_ns:
+        names = hit[1]
+    else:
+        try:
+            with os.scandir(base) as it:
+                names = [e.name for e in it if e.name.startswith("storyforge-") and e.is_dir()]
+        except OSError:
+            return None
+        _RUN_DIRS_CACHE[base] = (mtime_ns, names)
+    best = None
+    best_mtime = None
+    for name in names:
+        p = os.path.join(base, name)
+        try:
+            mt = os.stat(p).st_mtime
+        except OSError:
+            continue
+        if best_mtime is None or mt > best_mtime:
+            best, best_mtime = p, mt
+    return Path(best) if best else None
+
+
+def scan_tmp_job_dirs(tmp_root: Path, job_ids: set) -> dict:
+    """{job_id: newest tmp run dir} for the given jobs, in one pass over tmp_root."""
+    out = {}
+    try:
+        with os.scandir(tmp_root) as it:
+            for e in it:
+                if e.name in job_ids and e.is_dir():
+                    run = _newest_run_dir(e.path)
+                    if run:
+                        out[e.name] = run
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return out
+
+
+def find_tmp_job_dir(tmp_root: Path, job_id: str):
+    return _newest_run_dir(os.path.join(tmp_root, job_id))
 
 
 def find_latest_mp3(out_dir: Path, started_at: int):
@@ -410,51 +672,91 @@ def find_latest_mp3(out_dir: Path, started_at: int):
     return cands[0] if cands else None
 
 
+def tail_lines(path: Path, n: int, block: int = 64_000) -> str:
+    """Last n lines of a text file, reading only its end (grows the window if needed)."""
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            lines = f.read(size - start).decode("utf-8", errors="replace").splitlines()
+            if start > 0:
+                lines = lines[1:]  # first line is probably cut
+            if len(lines) >= n or start == 0:
+                return "\n".join(lines[-n:])
+            block *= 4
+
+
 def read_log_tail(tmp_job: Path, job_base: Path) -> str:
     logp = tmp_job / "render.log"
     if logp.exists():
-        return "\n".join(read_text(logp).splitlines()[-120:])
+        return tail_lines(logp, 120)
     logs = sorted(tmp_job.glob("*.log"), key=lambda p: p.stat().st_mtime, reverse=True)
     if logs:
-        return "\n".join(read_text(logs[0]).splitlines()[-120:])
+        return tail_lines(logs[0], 120)
     # also consider logs written to the per-job base (older runner versions)
     logs2 = sorted(job_base.glob("*.log"), key=lambda p: p.stat().st_mtime, reverse=True)
     if logs2:
-        return "\n".join(read_text(logs2[0]).splitlines()[-120:])
+        return tail_lines(logs2[0], 120)
 
     return ""
 
 
+# One /proc walk is shared by every job checked within the same second.
+_PROC_CACHE: tuple[float, list[str]] = (0.0, [])
+_PROC_LOCK = threading.Lock()
+
+
+def proc_cmdlines(ttl_s: float = 1.0) -> list[str]:
+    """Command lines of all processes, args joined by spaces like `ps -o args`."""
+    global _PROC_CACHE
+    with _PROC_LOCK:
+        now = time.monotonic()
+        if now - _PROC_CACHE[0] < ttl_s:
+            return _PROC_CACHE[1]
+        out = []
+        try:
+            pids = [p for p in os.listdir('/proc') if p.isdigit()]
+        except OSError:
+            pids = []
+        for pid in pids:
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    raw = f.read()
+            except OSError:
+                continue  # exited meanwhile / not readable
+            if raw:
+                out.append(raw.rstrip(b'\0').replace(b'\0', b' ').decode('utf-8', 'replace'))
+        _PROC_CACHE = (now, out)
+        return out
+
+
 def job_runtime_status(job_base: Path, tmp_job: Path | None, mp3_path: Path | None, done: int, total: int) -> dict:
     now = now_ts()
 
     # last activity: newest seg wav or newest log in tmp_job/job_base
     last = None
-    cands = []
-    if tmp_job and tmp_job.exists():
-        narr = tmp_job / 'narr'
-        if narr.exists():
-            cands += list(narr.glob('seg_*.wav'))
-        cands += list(tmp_job.glob('*.log'))
-    cands += list(job_base.glob('*.log'))
-    for pp in cands:
+    scans = [(job_base, '', '.log')]
+    if tmp_job:
+        scans += [(tmp_job / 'narr', 'seg_', '.wav'), (tmp_job, '', '.log')]
+    for d, prefix, suffix in scans:
         try:
-            ts = int(pp.stat().st_mtime)
-            if last is None or ts > last:
-                last = ts
-        except Exception:
+            with os.scandir(d) as it:
+                for e in it:
+                    if not (e.name.startswith(prefix) and e.name.endswith(suffix)) or e.name.startswith('.'):
+                        continue
+                    try:
+                        ts = int(e.stat().st_mtime)
+                    except OSError:
+                        continue
+                    if last is None or ts > last:
+                        last = ts
+        except OSError:
             pass
 
     # running? if any process references this job tmp path (voicegen writes full tmp paths)
-    running = False
-    try:
-        import subprocess
-        probe = job_base.as_posix().rstrip('/') + '/'
-        cmd = f"ps -eo args | grep -F {probe!r} | grep -v grep | wc -l"
-        out = subprocess.check_output(['bash','-lc', cmd], text=True).strip()
-        running = int(out) > 0
-    except Exception:
-        running = False
+    probe = job_base.as_posix().rstrip('/') + '/'
+    running = any(probe in args for args in proc_cmdlines())
 
     if running:
         return {
@@ -491,12 +793,30 @@ def job_runtime_status(job_base: Path, tmp_job: Path | None, mp3_path: Path | No
 
 
 def job_status(root: Path, job_id: str) -> dict:
+    st = _job_status_core(root, job_id)
+    if st["ok"]:
+        st.update(gpu=gpu_stats(), cpu=cpu_stats(), now=now_ts())
+    return st
+
+
+def job_status_polling(root: Path, job_id: str) -> dict:
+    """Just what the index page's 2.5s poller reads: progress, state, log tail."""
+    st = _job_status_core(root, job_id)
+    if not st["ok"]:
+        return st
+    return {
+        "ok": True,
+        "status": {"state": st["status"]["state"]},
+        "progress": st["progress"],
+        "log_tail": st["log_tail"],
+    }
+
+
+def _job_status_core(root: Path, job_id: str) -> dict:
     tmp_root = root / "tmp"
 
-    conn = db_connect(db_default_path(root))
-    db_init(conn)
-    meta = db_get_job(conn, job_id)
-    conn.close()
+    with db_session(db_default_path(root)) as conn:
+        meta = db_get_job(conn, job_id)
     if not meta:
         return {"ok": False, "error": "job_not_found"}
 
@@ -516,9 +836,7 @@ def job_status(root: Path, job_id: str) -> dict:
     done = 0
     tail = ""
     if tmp_job:
-        narr = tmp_job / "narr"
-        segs = sorted(narr.glob("seg_*.wav")) if narr.exists() else []
-        done = len(segs)
+        done = count_seg_wavs(tmp_job / "narr")
         tail = read_log_tail(tmp_job, tmp_root / job_id)
 
     mp3 = meta.get("mp3")
@@ -546,12 +864,48 @@ def job_status(root: Path, job_id: str) -> dict:
         "tmp_dir": str(tmp_job) if tmp_job else None,
         "mp3": str(mp3_path) if mp3_path else None,
         "log_tail": filter_log_tail(tail),
-        "gpu": gpu_stats(),
-        "cpu": cpu_stats(),
-        "now": now_ts(),
     }
 
 
+_HTML_TRANS = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"})
+
+
+def h(s: str) -> str:
+    """HTML-escape text and attribute values."""
+    return (s or "").translate(_HTML_TRANS)
+
+
+def fmt_ts(ts):
+    if not ts:
+        return "-"
+    try:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(ts)))
+    except Exception:
+        return str(ts)
+
+
+def fmt_elapsed(sec):
+    if sec is None:
+        return "-"
+    try:
+        sec = int(sec)
+    except Exception:
+        return "-"
+    if sec < 0:
+        sec = 0
+    hh = sec // 3600
+    mm = (sec % 3600) // 60
+    ss = sec % 60
+    if hh > 0:
+        return "%d:%02d:%02d" % (hh, mm, ss)
+    return "%d:%02d" % (mm, ss)
+
+
+def badge(state):
+    st = state or "unknown"
+    return '<span class="badge %s">%s</span>' % (st, st)
+
+
 class Handler(BaseHTTPRequestHandler):
     server_version = "StoryforgeMonitor/0.4"
 
@@ -564,11 +918,18 @@ class Handler(BaseHTTPRequestHandler):
 
     def _client_allowed(self) -> bool:
         ip = self.client_address[0]
-        try:
-            addr = ipaddress.ip_address(ip)
-            return any(addr in net for net in self.server.allow_nets)
-        except Exception:
-            return False
+        srv = self.server
+        with srv.allow_lock:
+            hit = srv.allow_cache.get(ip)
+            if hit is not None:
+                srv.allow_cache.move_to_end(ip)
+                return hit
+        ok = ip_allowed(ip, srv.allow_masks)
+        with srv.allow_lock:
+            srv.allow_cache[ip] = ok
+            if len(srv.allow_cache) > 256:
+                srv.allow_cache.popitem(last=False)
+        return ok
 
     def _token_ok(self) -> bool:
         qs = parse_qs(urlparse(self.path).query)
@@ -597,42 +958,8 @@ class Handler(BaseHTTPRequestHandler):
             # dynamic index page (server-rendered to avoid mobile browser JS quirks)
             qs = parse_qs(urlparse(self.path).query)
             token = (qs.get("t") or [""])[0]
-            conn = db_connect(self.server.db_path)
-            db_init(conn)
-            metas = db_list_jobs(conn)
-            conn.close()
-
-            def h(s: str) -> str:
-                return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;").replace("'", "&#39;")
-
-            def fmt_ts(ts):
-                if not ts:
-                    return "-"
-                try:
-                    import datetime
-                    return datetime.datetime.fromtimestamp(int(ts)).strftime("%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    return str(ts)
-
-            def fmt_elapsed(sec):
-                if sec is None:
-                    return "-"
-                try:
-                    sec = int(sec)
-                except Exception:
-                    return "-"
-                if sec < 0:
-                    sec = 0
-                hh = sec // 3600
-                mm = (sec % 3600) // 60
-                ss = sec % 60
-                if hh > 0:
-                    return "%d:%02d:%02d" % (hh, mm, ss)
-                return "%d:%02d" % (mm, ss)
-
-            def badge(state):
-                st = state or "unknown"
-                return '<span class="badge %s">%s</span>' % (st, st)
+            with db_session(self.server.db_path) as conn:
+                metas = db_list_jobs(conn)
 
             running = None
             for meta in metas:
@@ -704,7 +1031,10 @@ class Handler(BaseHTTPRequestHandler):
             else:
                 jid = running.get('id')
                 st = (running.get('status') or {}).get('state') or running.get('state') or 'running'
-                st_full = job_status_light(root, jid)
+                tmp_root = root / 'tmp'
+                job_base = tmp_root / jid
+                run_dir = find_tmp_job_dir(tmp_root, jid)
+                st_full = _light_status(running, run_dir)
                 prog = st_full.get('progress') or {}
                 done = prog.get('done')
                 total = prog.get('total')
@@ -718,12 +1048,7 @@ class Handler(BaseHTTPRequestHandler):
                     if done is None and total:
                         done = 0
                 pct = prog.get('pct') or 0
-                tmp_root = root / 'tmp'
-                job_base = tmp_root / jid
-                tmp_job = find_tmp_job_dir(tmp_root, jid) or job_base
-                tmp_root = root / 'tmp'
-                job_base = tmp_root / jid
-                tmp_job = find_tmp_job_dir(tmp_root, jid) or job_base
+                tmp_job = run_dir or job_base
                 log_tail = read_log_tail(tmp_job, job_base)
                 log_text = log_tail if log_tail else '(no log yet)'
                 started_at = running.get('started_at')
@@ -744,7 +1069,7 @@ class Handler(BaseHTTPRequestHandler):
                 parts.append('<details open><summary>Log tail</summary><pre id="run_log" class="logbox">' + h(log_text) + '</pre></details>')
                 parts.append('</div>')
 
-                parts.append('<script>(function(){const jid=' + json.dumps(jid) + ';const t=new URLSearchParams(location.search).get(\'t\')||\'\';const logEl=document.getElementById(\'run_log\');const pfill=document.getElementById(\'run_pfill\');const ptext=document.getElementById(\'run_ptext\');const stateEl=document.getElementById(\'run_state\');function lastLines(s,n){if(!s)return\'\';const lines=String(s).split(/\\r?\\n/);return lines.slice(Math.max(0,lines.length-n)).join("\\n");}async function tick(){try{const r=await fetch(\'/api/job/\'+encodeURIComponent(jid)+\'?t=\'+encodeURIComponent(t),{cache:\'no-store\'});if(!r.ok)return;const j=await r.json();if(!j||!j.ok)return;const prog=j.progress||{};const done=(prog.done??0);const total=(prog.total??0);const pct=(prog.pct??0);if(pfill)pfill.style.width=((pct?pct.toFixed(1):0)+\'%\');if(ptext)ptext.textContent=(total?(done+\'/\'+total+\' segments\'):(done+\' segments\'));const st=(j.status&&j.status.state)?j.status.state:\'running\';if(stateEl)stateEl.textContent=\'Status: \'+st;if(logEl){logEl.textContent=lastLines(j.log_tail||\'\',12);}if(st===\'completed\'||st===\'aborted\'){clearInterval(timer);setTimeout(function(){try{location.reload();}catch(e){}},900);}}catch(e){}}tick();const timer=setInterval(tick,2500);})();</script>')
+                parts.append('<script>(function(){const jid=' + json.dumps(jid) + ';const t=new URLSearchParams(location.search).get(\'t\')||\'\';const logEl=document.getElementById(\'run_log\');const pfill=document.getElementById(\'run_pfill\');const ptext=document.getElementById(\'run_ptext\');const stateEl=document.getElementById(\'run_state\');function lastLines(s,n){if(!s)return\'\';const lines=String(s).split(/\\r?\\n/);return lines.slice(Math.max(0,lines.length-n)).join("\\n");}async function tick(){try{const r=await fetch(\'/api/job/\'+encodeURIComponent(jid)+\'?poll=1&t=\'+encodeURIComponent(t),{cache:\'no-store\'});if(!r.ok)return;const j=await r.json();if(!j||!j.ok)return;const prog=j.progress||{};const done=(prog.done??0);const total=(prog.total??0);const pct=(prog.pct??0);if(pfill)pfill.style.width=((pct?pct.toFixed(1):0)+\'%\');if(ptext)ptext.textContent=(total?(done+\'/\'+total+\' segments\'):(done+\' segments\'));const st=(j.status&&j.status.state)?j.status.state:\'running\';if(stateEl)stateEl.textContent=\'Status: \'+st;if(logEl){logEl.textContent=lastLines(j.log_tail||\'\',12);}if(st===\'completed\'||st===\'aborted\'){clearInterval(timer);setTimeout(function(){try{location.reload();}catch(e){}},900);}}catch(e){}}tick();const timer=setInterval(tick,2500);})();</script>')
 
 
             parts.append('<h2 style="margin-top:18px;">History</h2>')
@@ -856,13 +1181,8 @@ class Handler(BaseHTTPRequestHandler):
             qs = parse_qs(urlparse(self.path).query)
             token = (qs.get("t") or [""])[0]
 
-            conn = db_connect(self.server.db_path)
-            db_init(conn)
-            metas = db_list_jobs(conn)
-            conn.close()
-
-            def h(s: str) -> str:
-                return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;").replace("'", "&#39;")
+            with db_session(self.server.db_path) as conn:
+                metas = db_list_jobs(conn)
 
             rows = []
             for meta in metas:
@@ -912,10 +1232,8 @@ class Handler(BaseHTTPRequestHandler):
             if engine == "tortoise":
                 voices = load_tortoise_roster(repo_root)
             # attach ratings
-            conn = db_connect(self.server.db_path)
-            db_init(conn)
-            ratings = {row[0]: row[1] for row in conn.execute("SELECT voice_id, rating FROM voice_ratings WHERE engine=?", (engine,)).fetchall()}
-            conn.close()
+            with db_session(self.server.db_path) as conn:
+                ratings = {row[0]: row[1] for row in conn.execute("SELECT voice_id, rating FROM voice_ratings WHERE engine=?", (engine,)).fetchall()}
             for v in voices:
                 v["rating"] = int(ratings.get(v["id"], 0) or 0)
             self._send(200, (json.dumps({"ok": True, "engine": engine, "voices": voices}) + "\n").encode(), "application/json")
@@ -930,14 +1248,13 @@ class Handler(BaseHTTPRequestHandler):
             if not engine or not vid:
                 self._send(400, (json.dumps({"ok": False})+"\n").encode(), "application/json")
                 return
-            conn = db_connect(self.server.db_path)
-            db_init(conn)
-            conn.execute("INSERT INTO voice_ratings(engine,voice_id,rating,updated_at) VALUES(?,?,?,?) ON CONFLICT(engine,voice_id) DO UPDATE SET rating=excluded.rating, updated_at=excluded.updated_at", (engine, vid, rating, now_ts()))
-            conn.commit(); conn.close()
+            with db_session(self.server.db_path) as conn:
+                conn.execute("INSERT INTO voice_ratings(engine,voice_id,rating,updated_at) VALUES(?,?,?,?) ON CONFLICT(engine,voice_id) DO UPDATE SET rating=excluded.rating, updated_at=excluded.updated_at", (engine, vid, rating, now_ts()))
+                conn.commit()
             self._send(200, (json.dumps({"ok": True})+"\n").encode(), "application/json")
             return
 
-        m = re.match(r"^/api/voice/demo/([a-zA-Z0-9_-]+)/([a-zA-Z0-9_-]+)$", path)
+        m = _VOICE_DEMO_RE.match(path)
         if m:
             engine = m.group(1)
             vid = m.group(2)
@@ -986,37 +1303,26 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if path == "/api/jobs":
-            conn = db_connect(self.server.db_path)
-            db_init(conn)
-            metas = db_list_jobs(conn)
-            conn.close()
-
-            items = []
-            for meta in metas:
-                jid = meta.get("id")
-                st = job_status_light(root, jid)
-                meta["status"] = st.get("status")
-                meta["mp3"] = st.get("mp3")
-                meta["progress"] = st.get("progress")
-                items.append(meta)
-
+            items = index_snapshot(root, self.server.db_path)
             self._send(200, (json.dumps({"ok": True, "jobs": items}) + "\n").encode(), "application/json")
             return
 
-        m = re.match(r"^/api/job/([a-zA-Z0-9_-]+)$", path)
+        m = _API_JOB_RE.match(path)
         if m:
             jid = m.group(1)
-            st = job_status(root, jid)
+            qs = parse_qs(urlparse(self.path).query)
+            if (qs.get("poll") or [""])[0] == "1":
+                st = job_status_polling(root, jid)
+            else:
+                st = job_status(root, jid)
             self._send(200, (json.dumps(st) + "\n").encode(), "application/json")
             return
 
-        m = re.match(r"^/api/sfml/([a-zA-Z0-9_-]+)$", path)
+        m = _API_SFML_RE.match(path)
         if m:
             jid = m.group(1)
-            conn = db_connect(self.server.db_path)
-            db_init(conn)
-            meta = db_get_job(conn, jid)
-            conn.close()
+            with db_session(self.server.db_path) as conn:
+                meta = db_get_job(conn, jid)
             if not meta:
                 self._send(404, b"job_not_found\n")
                 return
@@ -1037,13 +1343,11 @@ class Handler(BaseHTTPRequestHandler):
 
 
 
-        m = re.match(r"^/sfml/([a-zA-Z0-9_-]+)$", path)
+        m = _SFML_RE.match(path)
         if m:
             jid = m.group(1)
-            conn = db_connect(self.server.db_path)
-            db_init(conn)
-            meta = db_get_job(conn, jid)
-            conn.close()
+            with db_session(self.server.db_path) as conn:
+                meta = db_get_job(conn, jid)
             if not meta:
                 self._send(404, b"job_not_found\n")
                 return
@@ -1071,7 +1375,7 @@ class Handler(BaseHTTPRequestHandler):
 
         
 
-        m = re.match(r"^/audio/([a-zA-Z0-9_-]+)$", path)
+        m = _AUDIO_RE.match(path)
         if m:
             qs = parse_qs(urlparse(self.path).query)
             token = (qs.get("t") or [""])[0]
@@ -1094,7 +1398,7 @@ class Handler(BaseHTTPRequestHandler):
             self.wfile.write(data)
             return
 
-        m = re.match(r"^/dl/([a-zA-Z0-9_-]+)$", path)
+        m = _DL_RE.match(path)
         if m:
             jid = m.group(1)
             st = job_status(root, jid)
@@ -1132,13 +1436,18 @@ def main():
     conn = db_connect(db_path)
     db_init(conn)
     conn.close()
+    _DB_READY.add(str(db_path))  # request-time sessions never run DDL for this db
     migrate_jobs_json_to_db(root, db_path)
 
     httpd = ThreadingHTTPServer((args.host, args.port), Handler)
     httpd.root = root
     httpd.token = token
     httpd.allow_nets = allow_nets
+    httpd.allow_masks = compile_allow_nets(allow_nets)
+    httpd.allow_cache = OrderedDict()  # client ip -> allowed, LRU
+    httpd.allow_lock = threading.Lock()
     httpd.db_path = db_path
+    gpu_stats()  # start the GPU poller before the first request
 
     print(f"listening on http://{args.host}:{args.port} (token required)")
     print("allow:", ", ".join(str(n) for n in allow_nets))